@@ -0,0 +1,171 @@
+import math
+
+ROSTER_METRICS = ("kd", "level", "sr")
+
+
+class QuantileSketch:
+    # Log-bucketed histogram (DDSketch style): quantiles within `accuracy` relative
+    # error, and unlike most streaming sketches it supports removing values
+    def __init__(self, accuracy=0.01):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _bucket(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = self._bucket(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def remove(self, value):
+        if value <= 0:
+            if self.zeros:
+                self.zeros -= 1
+                self.count -= 1
+            return
+        index = self._bucket(value)
+        remaining = self.buckets.get(index, 0) - 1
+        if remaining < 0:
+            return
+        self.count -= 1
+        if remaining:
+            self.buckets[index] = remaining
+        else:
+            del self.buckets[index]
+
+    def quantile(self, q):
+        if not self.count:
+            return 0
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return 0
+        seen = self.zeros
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class RosterAggregate:
+    # Running sums per metric so averages are O(1) and each profile change is O(1)
+    def __init__(self, metrics=ROSTER_METRICS, accuracy=0.01):
+        self.metrics = metrics
+        self.members = {}
+        self.sums = {metric: 0.0 for metric in metrics}
+        self.sketches = {metric: QuantileSketch(accuracy) for metric in metrics}
+
+    def __contains__(self, key):
+        return key in self.members
+
+    @property
+    def count(self):
+        return len(self.members)
+
+    def update(self, key, values):
+        self.remove(key)
+        values = {metric: values[metric] for metric in self.metrics}
+        self.members[key] = values
+        for metric, value in values.items():
+            self.sums[metric] += value
+            self.sketches[metric].add(value)
+
+    def remove(self, key):
+        values = self.members.pop(key, None)
+        if values is None:
+            return
+        for metric, value in values.items():
+            self.sums[metric] -= value
+            self.sketches[metric].remove(value)
+        if not self.members:
+            # Drop any floating point drift once the roster is empty
+            self.sums = {metric: 0.0 for metric in self.metrics}
+
+    def mean(self, metric):
+        return self.sums[metric] / len(self.members) if self.members else 0
+
+    def median(self, metric):
+        return self.sketches[metric].quantile(0.5)
+
+    def quantile(self, metric, q):
+        return self.sketches[metric].quantile(q)
+
+
+class GuildRosters:
+    # One RosterAggregate per guild, kept current as profiles change, so a stat-channel refresh
+    # is O(1) per guild. A profile change touches only the guilds that player counts toward
+    def __init__(self, metrics=ROSTER_METRICS, accuracy=0.01):
+        self.metrics = metrics
+        self.accuracy = accuracy
+        self.members = {}  # guild_id -> set of player_ids
+        self.rosters = {}  # guild_id -> RosterAggregate
+        self.player_guilds = {}  # player_id -> set of guild_ids
+        self.values = {}  # player_id -> latest metric values, for players joining another guild
+        self.version = 0
+
+    def _roster(self, guild_id):
+        roster = self.rosters.get(guild_id)
+        if roster is None:
+            roster = self.rosters[guild_id] = RosterAggregate(self.metrics, self.accuracy)
+        return roster
+
+    def sync(self, user_config):
+        # Membership is rebuilt from user_config on track/untrack; only players whose guilds changed are re-added
+        members = {}
+        for user_data in user_config.values():
+            for guild_id in user_data.get("guilds", []):
+                members.setdefault(str(guild_id), set()).add(user_data["player_id"])
+
+        for guild_id in set(self.members) | set(members):
+            before, after = self.members.get(guild_id, set()), members.get(guild_id, set())
+            for player_id in before - after:
+                if guild_id in self.rosters:
+                    self.rosters[guild_id].remove(player_id)
+            for player_id in after - before:
+                if player_id in self.values:
+                    self._roster(guild_id).update(player_id, self.values[player_id])
+            if not after:
+                self.rosters.pop(guild_id, None)
+
+        player_guilds = {}
+        for guild_id, player_ids in members.items():
+            for player_id in player_ids:
+                player_guilds.setdefault(player_id, set()).add(guild_id)
+        self.members = members
+        self.player_guilds = player_guilds
+        self.version += 1
+
+    def update(self, player_id, values):
+        values = {metric: values[metric] for metric in self.metrics}
+        self.values[player_id] = values
+        for guild_id in self.player_guilds.get(player_id, ()):
+            self._roster(guild_id).update(player_id, values)
+
+    def remove(self, player_id):
+        self.values.pop(player_id, None)
+        for guild_id in self.player_guilds.get(player_id, ()):
+            if guild_id in self.rosters:
+                self.rosters[guild_id].remove(player_id)
+
+    def count(self, guild_id):
+        roster = self.rosters.get(str(guild_id))
+        return roster.count if roster else 0
+
+    def players(self, guild_ids):
+        # Everyone tracked in any of `guild_ids`
+        return set().union(*(self.members.get(str(guild_id), ()) for guild_id in guild_ids))
+
+    def stats(self, guild_id):
+        roster = self.rosters.get(str(guild_id)) or RosterAggregate(self.metrics, self.accuracy)
+        return {
+            "count": roster.count,
+            "mean": {metric: roster.mean(metric) for metric in self.metrics},
+            "median": {metric: roster.median(metric) for metric in self.metrics},
+        }
@@ -0,0 +1,138 @@
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import DiscordSink, FakeGuild, StandInProcess, load_tracker, measure  # noqa: E402
+from benchmarks.synthetic import profile_at  # noqa: E402
+
+# The counters format_embed used to look up per profile, current and previous
+EMBED_COUNTER_KEYS = [
+    ["Sessions", "Pmc"], ["ExitStatus", "Survived", "Pmc"], ["Kills"], ["Deaths"], ["LongestWinStreak", "Pmc"],
+    ["Kills"], ["Deaths"], ["ExitStatus", "Survived", "Pmc"], ["Sessions", "Pmc"], ["LongestWinStreak", "Pmc"],
+    ["Kills"], ["Deaths"],
+]
+BENCH_GUILDS = 10
+
+
+def linear_get_counter(data, key_path):
+    # The original list scan, kept as the baseline for the indexed lookups
+    for item in data.get("pmcStats", {}).get("eft", {}).get("overAllCounters", {}).get("Items", []):
+        if item["Key"] == key_path:
+            return item["Value"]
+    return 0
+
+
+async def run_size(size, counters, micro_sample, trace):
+    workdir = tempfile.mkdtemp(prefix="botbench-")
+    stand_in = StandInProcess(counters=counters)
+    await stand_in.start()
+    sink = DiscordSink()
+    tracker = load_tracker(workdir, stand_in, sink)
+    from player_profile import ParsedProfile
+
+    results = []
+    try:
+        sample = min(size, micro_sample)
+        previous = [profile_at(i, 0, counters=counters) for i in range(sample)]
+        current = [profile_at(i, 1, counters=counters) for i in range(sample)]
+
+        def legacy_counters():
+            for data in current:
+                for key in EMBED_COUNTER_KEYS:
+                    linear_get_counter(data, key)
+
+        def indexed_counters():
+            for data in current:
+                profile = ParsedProfile(data)
+                for key in EMBED_COUNTER_KEYS:
+                    profile.counter(*key)
+
+        results.append(await measure("get_counter (linear scan)", legacy_counters, sample * len(EMBED_COUNTER_KEYS), trace))
+        results.append(await measure("ParsedProfile + lookups", indexed_counters, sample * len(EMBED_COUNTER_KEYS), trace))
+
+        parsed_prev = [ParsedProfile(tracker.snapshot_store.save(str(i), p) or tracker.snapshot_store.load(str(i)))
+                       for i, p in enumerate(previous)]
+        parsed_cur = [ParsedProfile(p) for p in current]
+        diffs = []
+
+        def run_diffs():
+            diffs.extend(tracker.diff_stats(c, p) for c, p in zip(parsed_cur, parsed_prev))
+
+        def run_embeds():
+            for c, d, p in zip(parsed_cur, diffs, parsed_prev):
+                tracker.format_embed(c, d, c.raw.get("id"), p)
+
+        results.append(await measure("diff_stats", run_diffs, sample, trace))
+        results.append(await measure("format_embed", run_embeds, sample, trace))
+        for i in range(sample):
+            tracker.snapshot_store.delete(str(i))
+
+        tracker.poll_scheduler.store_path = os.path.join(workdir, "poll_schedule.json")
+        # Players spread over the guilds; every fourth is also tracked by a second user in guild 1
+        for i in range(size):
+            tracker.user_config[str(10 ** 17 + i)] = {"player_id": str(i), "last_notified": None, "guilds": [str(1 + i % BENCH_GUILDS)]}
+            if i % 4 == 0:
+                tracker.user_config[str(2 * 10 ** 17 + i)] = {"player_id": str(i), "last_notified": None, "guilds": ["1"]}
+        tracker.guild_rosters.sync(tracker.user_config)
+        tracker.delivery.start()
+
+        await stand_in.set_generation(0, warm=size)
+        results.append(await measure("daily_task (initial)", tracker.daily_task, size, trace))
+        await stand_in.set_generation(1, warm=size)
+        tracker.profile_cache.clear()
+        results.append(await measure("daily_task (all changed)", tracker.daily_task, size, trace))
+        tracker.profile_cache.clear()
+        results.append(await measure("daily_task (unchanged)", tracker.daily_task, size, trace))
+
+        guilds = [FakeGuild(sink, guild_id=i + 1, name=f"Benchmark Guild {i + 1}") for i in range(BENCH_GUILDS)]
+        results.append(await measure("refresh_stat_channels", lambda: tracker.refresh_stat_channels(guilds), len(guilds), trace))
+        results.append(await measure("refresh_stat_channels (noop)", lambda: tracker.refresh_stat_channels(guilds), len(guilds), trace))
+
+        upstream = await stand_in.stats()
+    finally:
+        await tracker.delivery.close()
+        await tracker.fetcher.close()
+        tracker.history_store.close()
+        stand_in.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n📈 Roster of {size:,} players in {BENCH_GUILDS} guilds ({counters} counters/profile, micro benchmarks over {sample:,} profiles)")
+    for result in results:
+        print(result)
+    print(
+        f"   Upstream: {upstream['requests']:,} requests, {upstream['not_modified']:,} not modified, "
+        f"{upstream['bytes_sent'] / 1024 / 1024:,.1f} MB sent"
+    )
+    print(f"   Discord: {sink.messages:,} DMs, {sink.embeds:,} embeds, {sink.edits:,} channel edits")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tracker against a local tarkov.dev stand-in.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--counters", type=int, default=300)
+    parser.add_argument("--micro-sample", type=int, default=1000)
+    parser.add_argument("--no-trace", action="store_true", help="skip tracemalloc for cleaner timings")
+    args = parser.parse_args()
+
+    if args.size is not None:
+        asyncio.run(run_size(args.size, args.counters, args.micro_sample, not args.no_trace))
+        return
+
+    # tracker.py is a module full of globals, so every roster size gets a fresh interpreter
+    for size in args.sizes:
+        command = [sys.executable, "-m", "benchmarks.bench_bot", "--size", str(size),
+                   "--counters", str(args.counters), "--micro-sample", str(args.micro_sample)]
+        if args.no_trace:
+            command.append("--no-trace")
+        subprocess.run(command, check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+if __name__ == "__main__":
+    main()
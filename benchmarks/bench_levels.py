@@ -0,0 +1,43 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from levels import XP_LEVELS, calculate_level_from_experience  # noqa: E402
+
+
+def linear_level(exp):
+    # The original reverse scan, kept here as the baseline
+    for i in range(len(XP_LEVELS) - 1, -1, -1):
+        if exp >= XP_LEVELS[i]:
+            return i + 1
+    return 1
+
+
+def timed(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench(size=100_000):
+    rng = random.Random(7)
+    exps = [rng.randint(0, XP_LEVELS[-1] + 1_000_000) for _ in range(size)]
+
+    linear_time, linear = timed(lambda: [linear_level(e) for e in exps])
+    bisect_time, bisected = timed(lambda: [calculate_level_from_experience(e) for e in exps])
+
+    assert linear == bisected
+
+    print(f"🎖 {size:,} experience values")
+    print(f"   Linear scan loop: {linear_time * 1000:,.1f} ms")
+    print(f"   Bisect loop:      {bisect_time * 1000:,.1f} ms ({linear_time / bisect_time:,.1f}x)")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
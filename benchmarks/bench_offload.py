@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import DiscordSink, StandInProcess, load_tracker  # noqa: E402
+from delivery import percentiles  # noqa: E402
+
+
+class LoopLagMonitor:
+    # Stands in for the gateway heartbeat: how late does a callback scheduled every `interval` run?
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def start(self):
+        self.lags = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        return self.lags
+
+
+async def run_config(size, workers, counters):
+    workdir = tempfile.mkdtemp(prefix="offloadbench-")
+    stand_in = StandInProcess(counters=counters)
+    await stand_in.start()
+    sink = DiscordSink()
+    os.environ["PROFILE_WORKERS"] = str(workers)
+    tracker = load_tracker(workdir, stand_in, sink)
+    tracker.poll_scheduler.store_path = os.path.join(workdir, "poll_schedule.json")
+    monitor = LoopLagMonitor()
+    rows = []
+    try:
+        for i in range(size):
+            tracker.user_config[str(10 ** 17 + i)] = {"player_id": str(i), "last_notified": None}
+        tracker.delivery.start()
+        tracker.pipeline.start()
+
+        for generation, label in ((0, "initial"), (1, "all changed")):
+            await stand_in.set_generation(generation, warm=size)
+            tracker.profile_cache.clear()
+            monitor.start()
+            start = time.perf_counter()
+            await tracker.daily_task()
+            elapsed = time.perf_counter() - start
+            lags = await monitor.stop()
+            rows.append((label, elapsed, percentiles(lags, (50, 99)), max(lags, default=0)))
+    finally:
+        tracker.pipeline.close()
+        await tracker.delivery.close()
+        await tracker.fetcher.close()
+        tracker.history_store.close()
+        stand_in.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    mode = tracker.pipeline.mode if workers else "inline"
+    print(f"\n🧵 {size:,} players, {counters} counters/profile, PROFILE_WORKERS={workers} ({mode})")
+    for label, elapsed, lag, worst in rows:
+        print(
+            f"   sweep ({label:<11}) {elapsed:>8,.2f} s"
+            f"   loop lag p50 {lag[50] * 1000:>7,.1f} ms  p99 {lag[99] * 1000:>7,.1f} ms  max {worst * 1000:>7,.1f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-loop lag during a sweep, with and without the profile worker pool.")
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, max(2, (os.cpu_count() or 1) - 1)])
+    parser.add_argument("--counters", type=int, default=300)
+    parser.add_argument("--run", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        asyncio.run(run_config(args.size, args.run, args.counters))
+        return
+
+    # PROFILE_WORKERS is read when tracker.py is imported, so each configuration gets a fresh interpreter
+    for workers in args.workers:
+        command = [sys.executable, "-m", "benchmarks.bench_offload", "--size", str(args.size),
+                   "--counters", str(args.counters), "--run", str(workers)]
+        subprocess.run(command, check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+if __name__ == "__main__":
+    main()
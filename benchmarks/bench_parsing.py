@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profile_stream import ProfileExtractor  # noqa: E402
+from snapshot_store import compact_profile  # noqa: E402
+from benchmarks.synthetic import make_profile  # noqa: E402
+
+CHUNK_SIZE = 1 << 16
+
+
+def full_load(body):
+    # What the bot did before streaming: the whole document is built, then compacted for the snapshot
+    data = json.loads(body)
+    compact_profile(data)
+    return data
+
+
+def streamed(chunks):
+    # Chunks as they come off the socket; the full body is never joined
+    extractor = ProfileExtractor()
+    for chunk in chunks:
+        extractor.feed(chunk)
+    return extractor.close()
+
+
+def best_time(func, arg, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def memory(func, arg):
+    # Peak while parsing, and what is still held afterwards (the cached result)
+    tracemalloc.start()
+    result = func(arg)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak, retained
+
+
+def bench(counters_list=(300, 4000), repeat=20):
+    for counters in counters_list:
+        body = json.dumps(make_profile(9_000_000, counters=counters)).encode()
+        chunks = [body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)]
+        assert streamed(chunks) == compact_profile(json.loads(body))
+
+        full_time = best_time(full_load, body, repeat)
+        stream_time = best_time(streamed, chunks, repeat)
+        # json.loads needs the whole body in memory first, the extractor only its chunk buffer
+        full_peak, full_held = memory(full_load, body)
+        stream_peak, stream_held = memory(streamed, chunks)
+        full_peak += len(body)
+
+        print(f"🧩 Profile with {counters:,} counters, {len(body) / 1024:,.1f} KB body")
+        print(f"   json.loads + compact: {full_time * 1000:>7,.2f} ms, peak {full_peak / 1024:>8,.1f} KB, held {full_held / 1024:>8,.1f} KB")
+        print(f"   streamed extraction:  {stream_time * 1000:>7,.2f} ms, peak {stream_peak / 1024:>8,.1f} KB, held {stream_held / 1024:>8,.1f} KB")
+        print(
+            f"   Parse time {full_time / stream_time:,.2f}x, peak memory {full_peak / stream_peak:,.1f}x lower, "
+            f"held memory {full_held / stream_held:,.1f}x lower"
+        )
+
+
+if __name__ == "__main__":
+    bench(tuple(int(arg) for arg in sys.argv[1:]) or (300, 4000))
@@ -0,0 +1,59 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snapshot_store import SnapshotStore  # noqa: E402
+from benchmarks.synthetic import make_profile  # noqa: E402
+
+
+def bench(players=200, repeat=3):
+    workdir = tempfile.mkdtemp(prefix="snapbench-")
+    try:
+        store = SnapshotStore(os.path.join(workdir, "compact"))
+        legacy_dir = os.path.join(workdir, "legacy")
+        os.makedirs(legacy_dir)
+
+        profiles = {str(9_000_000 + i): make_profile(9_000_000 + i) for i in range(players)}
+        for player_id, profile in profiles.items():
+            with open(os.path.join(legacy_dir, f"{player_id}_snapshot.json"), "w") as f:
+                json.dump(profile, f, indent=2)
+            store.save(player_id, profile)
+
+        legacy_size = sum(os.path.getsize(os.path.join(legacy_dir, name)) for name in os.listdir(legacy_dir))
+        compact_size = sum(os.path.getsize(store.snapshot_path(pid)) for pid in profiles)
+
+        def load_legacy():
+            for player_id in profiles:
+                with open(os.path.join(legacy_dir, f"{player_id}_snapshot.json"), "r") as f:
+                    json.load(f)
+
+        def load_compact():
+            for player_id in profiles:
+                store.load(player_id)
+
+        def best_of(func):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        legacy_time = best_of(load_legacy)
+        compact_time = best_of(load_compact)
+
+        print(f"📦 {players} snapshots")
+        print(f"   JSON (indent=2): {legacy_size / 1024:,.1f} KB, load {legacy_time * 1000:,.1f} ms")
+        print(f"   Compact gzip:    {compact_size / 1024:,.1f} KB, load {compact_time * 1000:,.1f} ms")
+        print(f"   Size ratio {legacy_size / compact_size:,.1f}x, load speedup {legacy_time / compact_time:,.1f}x")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
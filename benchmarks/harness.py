@@ -0,0 +1,249 @@
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+import tracemalloc
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks.synthetic import profile_at
+
+
+class TarkovStandIn:
+    # Local stand-in for players.tarkov.dev serving synthetic profiles with ETag support
+    def __init__(self, counters=300, host="127.0.0.1", port=0):
+        self.counters = counters
+        self.host = host
+        self.port = port
+        self.generation = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self._bodies = {}
+        self._runner = None
+
+    def body(self, player_id):
+        key = (player_id, self.generation)
+        body = self._bodies.get(key)
+        if body is None:
+            self._bodies = {k: v for k, v in self._bodies.items() if k[1] == self.generation}
+            body = json.dumps(profile_at(player_id, self.generation, counters=self.counters)).encode()
+            self._bodies[key] = body
+        return body
+
+    async def handle_profile(self, request):
+        self.requests += 1
+        player_id = request.match_info["player_id"]
+        etag = f'"{player_id}-{self.generation}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        body = self.body(player_id)
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+
+    async def handle_generation(self, request):
+        payload = await request.json()
+        self.generation = int(payload["generation"])
+        # Pre-build bodies so profile generation isn't part of the measured sweep
+        for player_id in range(payload.get("warm", 0)):
+            self.body(str(player_id))
+        return web.json_response({"generation": self.generation})
+
+    async def handle_stats(self, request):
+        return web.json_response({
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "bytes_sent": self.bytes_sent,
+        })
+
+    async def serve(self):
+        app = web.Application()
+        app.router.add_get("/pve/{player_id}.json", self.handle_profile)
+        app.router.add_post("/_generation", self.handle_generation)
+        app.router.add_get("/_stats", self.handle_stats)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        await asyncio.Event().wait()
+
+
+def _serve_stand_in(port, counters):
+    asyncio.run(TarkovStandIn(counters=counters, port=port).serve())
+
+
+class StandInProcess:
+    # Runs the stand-in in its own process so serving profiles doesn't skew the bot's timings
+    def __init__(self, counters=300, host="127.0.0.1"):
+        self.counters = counters
+        self.host = host
+        with socket.socket() as sock:
+            sock.bind((host, 0))
+            self.port = sock.getsockname()[1]
+        self._process = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def profile_url(self):
+        return f"{self.base_url}/pve/{{player_id}}.json"
+
+    async def start(self):
+        self._process = multiprocessing.Process(target=_serve_stand_in, args=(self.port, self.counters), daemon=True)
+        self._process.start()
+        async with aiohttp.ClientSession() as session:
+            for _ in range(100):
+                try:
+                    async with session.get(f"{self.base_url}/_stats"):
+                        return
+                except aiohttp.ClientConnectionError:
+                    await asyncio.sleep(0.05)
+        raise RuntimeError("Stand-in server did not start")
+
+    async def set_generation(self, generation, warm=0):
+        timeout = aiohttp.ClientTimeout(total=None)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            payload = {"generation": generation, "warm": warm}
+            async with session.post(f"{self.base_url}/_generation", json=payload) as res:
+                res.raise_for_status()
+
+    async def stats(self):
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{self.base_url}/_stats") as res:
+                return await res.json()
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+
+
+class DiscordSink:
+    def __init__(self):
+        self.messages = 0
+        self.embeds = 0
+        self.edits = 0
+        self.latency = 0.0
+
+    async def record_send(self, content=None, embeds=None, embed=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.messages += 1
+        self.embeds += len(embeds or []) + (1 if embed else 0)
+
+
+class FakeUser:
+    def __init__(self, user_id, sink):
+        self.id = user_id
+        self.sink = sink
+
+    async def send(self, content=None, embeds=None, embed=None):
+        await self.sink.record_send(content=content, embeds=embeds, embed=embed)
+
+
+class FakeRole:
+    def __init__(self, role_id):
+        self.id = role_id
+
+
+class FakeChannel:
+    _ids = itertools.count(1_000_000)
+
+    def __init__(self, name, sink, category=None):
+        self.id = next(self._ids)
+        self.name = name
+        self.category = category
+        self.sink = sink
+
+    async def edit(self, name):
+        self.sink.edits += 1
+        self.name = name
+
+    async def delete(self):
+        pass
+
+
+class FakeGuild:
+    def __init__(self, sink, guild_id=1, name="Benchmark Guild"):
+        self.id = guild_id
+        self.name = name
+        self.sink = sink
+        self.default_role = FakeRole(0)
+        self.me = FakeRole(guild_id)
+        self.categories = []
+        self.channels = {}
+
+    def get_role(self, role_id):
+        return FakeRole(role_id)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def create_category(self, name, overwrites=None):
+        category = FakeChannel(name, self.sink)
+        self.categories.append(category)
+        return category
+
+    async def create_voice_channel(self, name, category=None, overwrites=None):
+        channel = FakeChannel(name, self.sink, category)
+        self.channels[channel.id] = channel
+        return channel
+
+
+def load_tracker(workdir, stand_in, sink):
+    # tracker.py resolves its data files relative to the working directory
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import fetcher
+    import tracker
+
+    fetcher.PROFILE_URL = stand_in.profile_url
+    tracker.bot.get_user = lambda user_id: FakeUser(user_id, sink)
+
+    async def fetch_user(user_id):
+        return FakeUser(user_id, sink)
+
+    tracker.bot.fetch_user = fetch_user
+    return tracker
+
+
+class Measurement:
+    def __init__(self, label, seconds, peak_bytes, net_blocks, calls=1):
+        self.label = label
+        self.seconds = seconds
+        self.peak_bytes = peak_bytes
+        self.net_blocks = net_blocks
+        self.calls = calls
+
+    def __str__(self):
+        per_call = self.seconds / self.calls * 1e6 if self.calls else 0
+        return (
+            f"   {self.label:<28} {self.seconds * 1000:>10,.1f} ms"
+            f"  {per_call:>10,.1f} µs/call"
+            f"  peak {self.peak_bytes / 1024 / 1024:>8,.1f} MB"
+            f"  net blocks {self.net_blocks:>+10,}"
+        )
+
+
+async def measure(label, func, calls=1, trace=True):
+    if trace:
+        tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    result = func()
+    if asyncio.iscoroutine(result):
+        await result
+    elapsed = time.perf_counter() - start
+    net_blocks = sys.getallocatedblocks() - blocks_before
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return Measurement(label, elapsed, peak, net_blocks, calls)
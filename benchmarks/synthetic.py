@@ -0,0 +1,127 @@
+import random
+import time
+
+SKILL_IDS = [
+    "Endurance", "Strength", "Vitality", "Health", "StressResistance", "Metabolism", "Immunity",
+    "Perception", "Intellect", "Attention", "Charisma", "Pistol", "Revolver", "SMG", "Assault",
+    "Shotgun", "Sniper", "LMG", "HMG", "Launcher", "AttachedLauncher", "Throwing", "Melee", "DMR",
+    "RecoilControl", "AimDrills", "Troubleshooting", "Surgery", "CovertMovement", "Search",
+    "MagDrills", "LightVests", "HeavyVests", "WeaponTreatment", "Crafting", "HideoutManagement",
+    "BotReload", "BotSound", "ProneMovement", "FirstAid", "FieldMedicine",
+]
+
+COUNTER_SECTIONS = [
+    "Kills", "Deaths", "Sessions", "ExitStatus", "LongestWinStreak", "BodyPartsDamage",
+    "Damage", "HitCount", "CauseBodyDamage", "ExperienceGained", "Money", "Items", "Exploration",
+    "LootingStats", "HealingStats", "CombatStats", "DamageHistory", "WeaponUsage",
+]
+
+SUB_KEYS = ["Pmc", "Savage", "Survived", "Killed", "Left", "Transit", "Runner", "MissingInAction",
+            "Head", "Chest", "Stomach", "LeftArm", "RightArm", "LeftLeg", "RightLeg"]
+
+
+def make_profile(player_id, seed=None, counters=4000, mastering=80, achievements=60):
+    rng = random.Random(seed if seed is not None else player_id)
+    kills = rng.randint(0, 20000)
+    deaths = rng.randint(1, 5000)
+    raids = rng.randint(deaths, deaths * 3 + 10)
+    survived = rng.randint(0, raids - deaths) if raids > deaths else 0
+
+    items = [
+        {"Key": ["Sessions", "Pmc"], "Value": raids},
+        {"Key": ["ExitStatus", "Survived", "Pmc"], "Value": survived},
+        {"Key": ["Kills"], "Value": kills},
+        {"Key": ["Deaths"], "Value": deaths},
+        {"Key": ["LongestWinStreak", "Pmc"], "Value": rng.randint(0, 60)},
+    ]
+    seen = {tuple(item["Key"]) for item in items}
+    while len(items) < counters:
+        key = [rng.choice(COUNTER_SECTIONS)] + rng.sample(SUB_KEYS, rng.randint(1, 3))
+        key.append(f"{rng.randrange(16 ** 8):08x}")
+        if tuple(key) in seen:
+            continue
+        seen.add(tuple(key))
+        items.append({"Key": key, "Value": rng.randint(0, 100000)})
+    rng.shuffle(items)
+
+    return {
+        "id": str(player_id),
+        "aid": int(player_id) if str(player_id).isdigit() else rng.randint(1, 10 ** 8),
+        "updated": int(time.time() * 1000) - rng.randint(0, 10 ** 9),
+        "info": {
+            "nickname": f"Player{player_id}",
+            "side": rng.choice(["Usec", "Bear"]),
+            "experience": rng.randint(0, 60_000_000),
+            "memberCategory": 0,
+            "bannedState": False,
+            "bannedUntil": 0,
+            "registrationDate": rng.randint(1_600_000_000, 1_700_000_000),
+        },
+        "customization": {part: f"{rng.randrange(16 ** 24):024x}" for part in ("head", "body", "feet", "hands")},
+        "skills": {
+            "Common": [
+                {"Id": skill, "Progress": round(rng.uniform(0, 5100), 3), "PointsEarnedDuringSession": 0,
+                 "LastAccess": rng.randint(0, 10 ** 9)}
+                for skill in SKILL_IDS
+            ],
+            "Mastering": [
+                {"Id": f"{rng.randrange(16 ** 24):024x}", "Progress": rng.randint(0, 20000)}
+                for _ in range(mastering)
+            ],
+            "Points": 0,
+        },
+        "equipment": {
+            "Id": f"{rng.randrange(16 ** 24):024x}",
+            "Items": [
+                {"_id": f"{rng.randrange(16 ** 24):024x}", "_tpl": f"{rng.randrange(16 ** 24):024x}",
+                 "parentId": f"{rng.randrange(16 ** 24):024x}", "slotId": rng.choice(SUB_KEYS)}
+                for _ in range(120)
+            ],
+        },
+        "achievements": {f"{rng.randrange(16 ** 24):024x}": rng.randint(1_600_000_000, 1_800_000_000)
+                         for _ in range(achievements)},
+        "favoriteItems": [],
+        "pmcStats": {
+            "eft": {
+                "totalInGameTime": rng.randint(0, 4_000_000),
+                "overAllCounters": {"Items": items},
+            }
+        },
+        "scavStats": {
+            "eft": {
+                "totalInGameTime": rng.randint(0, 400_000),
+                "overAllCounters": {"Items": items[: counters // 4]},
+            }
+        },
+    }
+
+
+def bump_profile(profile, seed=0):
+    # Simulate a few raids worth of progress on top of an existing profile
+    rng = random.Random(seed)
+    bumped = {**profile, "info": dict(profile["info"]), "updated": profile["updated"] + 3_600_000}
+    bumped["info"]["experience"] += rng.randint(1000, 200000)
+    bumped["skills"] = {
+        **profile["skills"],
+        "Common": [{**s, "Progress": s["Progress"] + (rng.uniform(0, 150) if rng.random() < 0.4 else 0)}
+                   for s in profile["skills"]["Common"]],
+        "Mastering": [{**m, "Progress": m["Progress"] + (rng.randint(0, 300) if rng.random() < 0.1 else 0)}
+                      for m in profile["skills"]["Mastering"]],
+    }
+    items = []
+    for item in profile["pmcStats"]["eft"]["overAllCounters"]["Items"]:
+        if item["Key"] in (["Kills"], ["Deaths"], ["Sessions", "Pmc"], ["ExitStatus", "Survived", "Pmc"]):
+            item = {"Key": item["Key"], "Value": item["Value"] + rng.randint(0, 10)}
+        items.append(item)
+    bumped["pmcStats"] = {"eft": {**profile["pmcStats"]["eft"],
+                                  "totalInGameTime": profile["pmcStats"]["eft"]["totalInGameTime"] + 3600,
+                                  "overAllCounters": {"Items": items}}}
+    return bumped
+
+
+def profile_at(player_id, generation=0, counters=4000):
+    # Deterministic profile for a player after `generation` rounds of play
+    profile = make_profile(player_id, counters=counters)
+    for step in range(generation):
+        profile = bump_profile(profile, seed=f"{player_id}-{step}")
+    return profile
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import discord
+
+from metrics import Metrics
+
+# Discord allows 2 renames per channel every 10 minutes
+RENAME_CAPACITY = 2
+RENAME_PERIOD = 600
+
+
+class TokenBucket:
+    def __init__(self, capacity=RENAME_CAPACITY, period=RENAME_PERIOD):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self):
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self):
+        self._refill()
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def drain(self, retry_after):
+        # Upstream told us exactly how long to wait, trust it over our own estimate
+        self._refill()
+        self.tokens = min(self.tokens, 1 - retry_after * self.rate)
+
+
+class ChannelRenamer:
+    def __init__(self, capacity=RENAME_CAPACITY, period=RENAME_PERIOD, metrics=None):
+        self.capacity = capacity
+        self.period = period
+        self.metrics = metrics or Metrics()
+        self.buckets = {}
+        self.pending = {}  # channel_id -> (channel, desired name); newer requests replace older ones
+        self.applied = 0
+        self.skipped = 0
+        self.deferred = 0
+        self._retry = None
+        self._retry_task = None
+        self._flush_lock = asyncio.Lock()
+
+    def request(self, channel, name):
+        if channel.name == name:
+            self.pending.pop(channel.id, None)
+            self.skipped += 1
+            return
+        self.pending[channel.id] = (channel, name)
+
+    def _bucket(self, channel_id):
+        bucket = self.buckets.get(channel_id)
+        if bucket is None:
+            bucket = self.buckets[channel_id] = TokenBucket(self.capacity, self.period)
+        return bucket
+
+    async def flush(self):
+        # The retry timer and refresh_stat_channels can both flush; one at a time so a channel isn't edited twice
+        async with self._flush_lock:
+            await self._flush()
+
+    async def _flush(self):
+        for channel_id in list(self.pending):
+            entry = self.pending.get(channel_id)
+            if entry is None:
+                continue
+            channel, name = entry
+            if channel.name == name:
+                del self.pending[channel_id]
+                self.skipped += 1
+                continue
+
+            bucket = self._bucket(channel_id)
+            if not bucket.try_take():
+                self.deferred += 1
+                continue
+
+            del self.pending[channel_id]
+            try:
+                with self.metrics.span("channel_edit"):
+                    await channel.edit(name=name)
+                self.applied += 1
+            except discord.RateLimited as e:
+                self.metrics.inc("channel_edits_rate_limited")
+                bucket.drain(e.retry_after)
+                self.pending.setdefault(channel_id, (channel, name))
+                self.deferred += 1
+            except discord.Forbidden:
+                print(f"❌ Missing permission to edit channel {channel.name} ({channel.id})")
+            except Exception as e:
+                print(f"❌ Unexpected error editing channel {channel.id}: {e}")
+
+        self._schedule_retry()
+
+    def _schedule_retry(self):
+        if self._retry is not None:
+            self._retry.cancel()
+            self._retry = None
+        if not self.pending:
+            return
+        delay = min(self._bucket(channel_id).wait_time() for channel_id in self.pending)
+        self._retry = asyncio.get_running_loop().call_later(max(delay, 1), self._run_retry)
+
+    def _run_retry(self):
+        self._retry = None
+        self._retry_task = asyncio.create_task(self.flush())
+
+    def stats(self):
+        return {
+            "applied": self.applied,
+            "skipped": self.skipped,
+            "deferred": self.deferred,
+            "pending": len(self.pending),
+        }
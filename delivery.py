@@ -0,0 +1,167 @@
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+import discord
+
+from metrics import Metrics
+from snapshot_store import atomic_write
+
+
+class DeliveryQueue:
+    def __init__(self, bot, workers=8, max_attempts=5, base_delay=1.0, max_delay=60.0,
+                 store_path="./snapshots/pending_dms.json", metrics=None):
+        self.bot = bot
+        self.metrics = metrics or Metrics()
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.store_path = store_path
+        self.pending = {}  # notification id -> serialisable notification, persisted until delivered
+        self.latencies = []
+        self.delivered = 0
+        self.failed = 0
+        self._queue = None
+        self._tasks = []
+        self._dirty = False
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self.load()
+        for notification_id in self.pending:
+            self._queue.put_nowait(notification_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.pending:
+            print(f"📮 Restored {len(self.pending)} undelivered notifications.")
+
+    def enqueue(self, discord_id, content=None, embeds=None):
+        notification_id = uuid.uuid4().hex
+        self.pending[notification_id] = {
+            "discord_id": str(discord_id),
+            "content": content,
+            # Embeds built in a worker process arrive already serialised
+            "embeds": [embed if isinstance(embed, dict) else embed.to_dict() for embed in embeds or []],
+            "created": time.time(),
+        }
+        self._dirty = True
+        self._queue.put_nowait(notification_id)
+        return notification_id
+
+    async def flush(self):
+        # Serialised on the loop so workers can't change `pending` mid-dump, written on a thread
+        if not self._dirty:
+            return
+        self._dirty = False
+        payload = json.dumps(self.pending).encode()
+        await asyncio.to_thread(atomic_write, self.store_path, payload)
+
+    async def join(self):
+        self.persist()
+        await self._queue.join()
+        self.persist()
+
+    def take_latencies(self):
+        latencies, self.latencies = self.latencies, []
+        return latencies
+
+    async def _get_user(self, discord_id):
+        # Cache first: fetch_user is an API call every time
+        user = self.bot.get_user(int(discord_id))
+        if user is None:
+            user = await self.bot.fetch_user(int(discord_id))
+        return user
+
+    def _backoff(self, attempt):
+        # Full jitter keeps retries from many workers from lining up again
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def _deliver(self, notification):
+        user = await self._get_user(notification["discord_id"])
+        kwargs = {"content": notification["content"]}
+        if notification["embeds"]:
+            kwargs["embeds"] = [discord.Embed.from_dict(data) for data in notification["embeds"]]
+        await user.send(**kwargs)
+
+    async def _worker(self):
+        while True:
+            notification_id = await self._queue.get()
+            try:
+                notification = self.pending.get(notification_id)
+                if notification is not None:
+                    await self._attempt(notification_id, notification)
+            except Exception as e:
+                # Not retryable as far as we know; dropped so it isn't stuck in pending and re-sent after a restart
+                print(f"❌ Delivery worker error for {notification_id}: {e}")
+                if self.pending.pop(notification_id, None) is not None:
+                    self.failed += 1
+                    self.metrics.inc("dms", result="failed")
+                    self._dirty = True
+            finally:
+                self._queue.task_done()
+
+    async def _attempt(self, notification_id, notification):
+        for attempt in range(self.max_attempts):
+            try:
+                with self.metrics.span("dm_send"):
+                    await self._deliver(notification)
+            except discord.RateLimited as e:
+                self.metrics.inc("dm_retries", reason="rate_limited")
+                delay = e.retry_after + self._backoff(0)
+            except discord.HTTPException as e:
+                if e.status != 429 and e.status < 500:
+                    # Closed DMs, unknown user etc. won't succeed on retry
+                    print(f"❌ Could not DM {notification['discord_id']}: {e}")
+                    self.failed += 1
+                    self.metrics.inc("dms", result="failed")
+                    break
+                self.metrics.inc("dm_retries", reason=str(e.status))
+                delay = self._backoff(attempt)
+            except (OSError, asyncio.TimeoutError) as e:
+                self.metrics.inc("dm_retries", reason=type(e).__name__)
+                delay = self._backoff(attempt)
+            else:
+                self.delivered += 1
+                self.metrics.inc("dms", result="delivered")
+                self.latencies.append(time.time() - notification["created"])
+                break
+            if attempt + 1 < self.max_attempts:
+                await asyncio.sleep(delay)
+        else:
+            print(f"❌ Giving up on DM to {notification['discord_id']} after {self.max_attempts} attempts.")
+            self.failed += 1
+            self.metrics.inc("dms", result="gave_up")
+
+        self.pending.pop(notification_id, None)
+        self._dirty = True
+
+    def load(self):
+        if os.path.exists(self.store_path):
+            with open(self.store_path, "r") as f:
+                self.pending.update(json.load(f))
+
+    def persist(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        atomic_write(self.store_path, json.dumps(self.pending).encode())
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._dirty = True
+        self.persist()
+
+
+def percentiles(values, points=(50, 90, 99)):
+    if not values:
+        return {p: 0 for p in points}
+    ordered = sorted(values)
+    return {p: ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))] for p in points}
@@ -0,0 +1,149 @@
+from discord import Embed
+
+
+def format_embed(profile, diff, player_id, previous=None):
+    def annotate_change(current, previous_val):
+        if previous_val is None:
+            return f"{current:,.2f}" if isinstance(current, float) else f"{current:,}"
+
+        delta = current - previous_val
+        if delta == 0:
+            return f"{current:,.2f}" if isinstance(current, float) else f"{current:,}"
+
+        sign = "+" if delta > 0 else "-"
+        if isinstance(current, float):
+            return f"{current:,.2f} ({sign}{abs(delta):,.2f})"
+        else:
+            return f"{current:,} ({sign}{abs(delta):,})"
+
+    name = profile.nickname
+    exp = profile.experience
+    level = profile.level
+    side = profile.side
+    time_played_hrs = profile.hours_played
+
+    pmc_raids = profile.pmc_raids
+    survived = profile.survived
+    kills = profile.kills
+    deaths = profile.deaths
+    kd_ratio = profile.kd_ratio
+    sr_ratio = profile.sr_ratio
+    achievements = profile.achievements
+    win_streak = profile.win_streak
+
+    # For diffs in overall embed
+    prev_kills = previous.kills if previous else None
+    prev_deaths = previous.deaths if previous else None
+    prev_survived = previous.survived if previous else None
+    prev_raids = previous.pmc_raids if previous else None
+    prev_played = previous.time_played if previous else None
+    prev_played_hrs = prev_played / 3600 if prev_played else None
+    prev_streak = previous.win_streak if previous else None
+    prev_achievements = previous.achievements if previous else None
+    prev_level = previous.level if previous else None
+    prev_kd = (prev_kills / prev_deaths) if prev_kills is not None and prev_deaths and prev_deaths > 0 else None
+    prev_sr = (prev_survived / prev_raids) * 100 if prev_survived is not None and prev_raids else None
+
+    updated_embed = Embed(
+        title="📊 Updated Tarkov Stats",
+        description=f"\n[{name}](https://tarkov.dev/players/pve/{player_id}) \nSide: {side}",
+        color=0x00ff99
+    )
+    updated_embed.set_thumbnail(url="https://cdn-icons-png.flaticon.com/512/5354/5354526.png")
+
+    updated_embed.add_field(name="PMC Level", value=f"```{annotate_change(level, prev_level)}```", inline=False)
+
+    if diff["experience"]:
+        d = diff["experience"]
+        updated_embed.add_field(
+            name="Experience",
+            value=f"```{d['from']:,} → {d['to']:,} (+{d['diff']:,})```",
+            inline=False
+        )
+    else:
+        updated_embed.add_field(
+            name="Experience",
+            value=f"```{exp:,} (no change)```",
+            inline=False
+        )
+
+    updated_embed.add_field(name="Achievements", value=f"```{annotate_change(achievements, prev_achievements)}```", inline=True)
+    updated_embed.add_field(name="PMC Raids", value=f"```{annotate_change(pmc_raids, prev_raids)}```", inline=True)
+    updated_embed.add_field(name="Survived", value=f"```{annotate_change(survived, prev_survived)}```", inline=True)
+    updated_embed.add_field(name="Kills", value=f"```{annotate_change(kills, prev_kills)}```", inline=True)
+    updated_embed.add_field(name="Deaths", value=f"```{annotate_change(deaths, prev_deaths)}```", inline=True)
+    updated_embed.add_field(name="K/D Ratios", value=f"```{annotate_change(kd_ratio, prev_kd)}```", inline=True)
+    updated_embed.add_field(name="S/R Ratio", value=f"```{annotate_change(sr_ratio, prev_sr)}```", inline=True)
+    updated_embed.add_field(name="Time Played (hrs)", value=f"```{annotate_change(time_played_hrs, prev_played_hrs)}```", inline=True)
+
+    if diff["skills"]:
+        filtered_changes = [
+            s for s in diff["skills"]
+            if int(s["from"] // 100) != int(s["to"] // 100)
+        ]
+
+        if filtered_changes:
+            sorted_changes = sorted(filtered_changes, key=lambda s: s["diff"], reverse=True)[:5]
+            skill_lines = [
+                f"• {s['id']}: Level {int(s['from'] // 100)} → {int(s['to'] // 100)} (+{int(s['to'] // 100 - s['from'] // 100)})"
+                for s in sorted_changes
+            ]
+            updated_embed.add_field(name="🧠 Top Skill Changes", value=f"```{chr(10).join(skill_lines)}```", inline=False)
+        else:
+            updated_embed.add_field(name="🧠 Top Skill Changes", value="```No skill level changes```", inline=False)
+
+    if diff["mastery"]:
+        filtered_mastery = [
+            m for m in diff["mastery"]
+            if int(m["from"]) != int(m["to"])
+        ]
+
+        if filtered_mastery:
+            sorted_mastery = sorted(filtered_mastery, key=lambda m: m["diff"], reverse=True)[:5]
+            mastery_lines = [
+                f"• {m['id']}: EXP {int(m['from'])} → {int(m['to'])} (+{int(m['to'] - m['from'])})"
+                for m in sorted_mastery
+            ]
+            updated_embed.add_field(name="🔫 Weapon Mastery Changes", value=f"```{chr(10).join(mastery_lines)}```", inline=False)
+        else:
+            updated_embed.add_field(name="🔫 Weapon Mastery Changes", value="```No weapon mastery level changes```", inline=False)
+
+    # Capped like the other lists so the field stays under Discord's 1024 characters
+    skills_added = diff.get("skills_added", [])
+    mastery_added = diff.get("mastery_added", [])
+    new_lines = [f"• {s['id']}: Level {int(s['to'] // 100)}" for s in skills_added[:5]]
+    new_lines += [f"• {m['id']}: EXP {int(m['to'])}" for m in mastery_added[:5]]
+    overflow = max(len(skills_added) - 5, 0) + max(len(mastery_added) - 5, 0)
+    if overflow:
+        new_lines.append(f"+{overflow} more")
+    if new_lines:
+        updated_embed.add_field(name="🆕 New Skills & Mastery", value=f"```{chr(10).join(new_lines)}```", inline=False)
+
+    updated_embed.set_footer(text="Tracked via PVE Stats Tracker and Tarkov.Dev")
+
+    # ▶️ Overall Embed
+    overall_embed = Embed(
+        title=f"📘 Overall PVE Tarkov Stats for {name}",
+        color=0x6666ff
+    )
+    overall_embed.set_thumbnail(url="https://cdn-icons-png.flaticon.com/512/5354/5354526.png")
+
+    overall_embed.add_field(name="PMC Level", value=f"```{level}```", inline=False)
+    overall_embed.add_field(name="Experience", value=f"```{exp}```", inline=True)
+    overall_embed.add_field(name="Achievements", value=f"```{achievements}```", inline=True)
+    overall_embed.add_field(name="PMC Raids", value=f"```{pmc_raids}```", inline=True)
+    overall_embed.add_field(name="Survived", value=f"```{survived}```", inline=True)
+    overall_embed.add_field(name="K/D Ratio", value=f"```{kd_ratio:.2f}```", inline=True)
+    overall_embed.add_field(name="S/R Ratio", value=f"```{sr_ratio:.2f}```", inline=True)
+    overall_embed.add_field(name="Longest Win Streak", value=f"```{annotate_change(win_streak, prev_streak)}```", inline=True)
+    
+    if len(profile.common):
+        skills_text = "\n".join([
+            f"{skill_id}: Level {int(progress // 100)}"
+            for skill_id, progress in profile.common.top(5)
+        ])
+        overall_embed.add_field(name="🏅 Top Skills", value=f"```{skills_text}```", inline=False)
+
+    overall_embed.set_footer(text="Snapshot from PVE Stats Tracker and Tarkov.Dev")
+
+    return updated_embed, overall_embed
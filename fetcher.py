@@ -0,0 +1,177 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+import aiohttp
+
+from metrics import Metrics
+from profile_stream import ProfileExtractor
+
+PROFILE_URL = "https://players.tarkov.dev/pve/{player_id}.json"
+STREAM_CHUNK_SIZE = 1 << 16
+
+
+class FetchedProfile:
+    def __init__(self, player_id, data, validators, size, body=None, not_modified=False):
+        self.player_id = player_id
+        self.data = data  # None on a 304, or when the fetcher leaves parsing to a worker
+        self.body = body  # undecoded response when the fetcher leaves parsing to a worker
+        self.validators = validators
+        self.size = size
+        # Set from the status code: data and body are both cleared once a profile has been parsed
+        self.not_modified = not_modified
+        self.parsed = None
+
+
+class ProfileFetcher:
+    def __init__(self, concurrency=10, timeout=20, metrics=None, decode="stream"):
+        # decode: "stream" extracts the compact profile while the body arrives, "json" loads
+        # the whole document, None hands back the raw body
+        self.concurrency = concurrency
+        self.decode = decode
+        self.metrics = metrics or Metrics()
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._session = None
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0
+        self.not_modified = 0
+
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def fetch(self, player_id, validators=None):
+        headers = {}
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        session = self.session()
+        async with self._semaphore:
+            try:
+                with self.metrics.span("upstream_request"):
+                    async with session.get(PROFILE_URL.format(player_id=player_id), headers=headers) as res:
+                        self.metrics.inc("upstream_responses", status=res.status)
+                        if res.status == 304 and validators:
+                            size = validators.get("size", 0)
+                            self.not_modified += 1
+                            self.bytes_saved += size
+                            return FetchedProfile(player_id, None, validators, size, not_modified=True)
+
+                        res.raise_for_status()
+                        if self.decode == "stream":
+                            data, body, size = await self._extract(res)
+                        else:
+                            body = await res.read()
+                            size = len(body)
+                            data = json.loads(body) if self.decode == "json" else None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.metrics.inc("upstream_errors", kind=type(e).__name__)
+                raise
+
+        self.bytes_downloaded += size
+        self.metrics.inc("upstream_bytes", size)
+        new_validators = {
+            "etag": res.headers.get("ETag"),
+            "last_modified": res.headers.get("Last-Modified"),
+            "size": size,
+        }
+        return FetchedProfile(player_id, data, new_validators, size, body=body if data is None else None)
+
+    async def _extract(self, res):
+        # The full body is never held: each chunk is parsed and dropped as it arrives
+        extractor = ProfileExtractor()
+        size = 0
+        async for chunk in res.content.iter_chunked(STREAM_CHUNK_SIZE):
+            extractor.feed(chunk)
+            size += len(chunk)
+        return extractor.close(), None, size
+
+    def stats(self):
+        return {
+            "bytes_downloaded": self.bytes_downloaded,
+            "bytes_saved": self.bytes_saved,
+            "not_modified": self.not_modified,
+        }
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class ProfileCache:
+    def __init__(self, fetch, ttl=900, max_size=5000):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()  # player_id -> (expires_at, profile)
+        self._pending = {}  # player_id -> in-flight fetch task
+
+    def peek(self, player_id):
+        entry = self._entries.get(player_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[player_id]
+            return None
+        self._entries.move_to_end(player_id)
+        return entry[1]
+
+    def put(self, player_id, profile):
+        self._entries[player_id] = (time.monotonic() + self.ttl, profile)
+        self._entries.move_to_end(player_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, player_id):
+        self._entries.pop(player_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def _load(self, player_id):
+        try:
+            profile = await self.fetch(player_id)
+            self.put(player_id, profile)
+            return profile
+        finally:
+            self._pending.pop(player_id, None)
+
+    async def get(self, player_id):
+        profile = self.peek(player_id)
+        if profile is not None:
+            self.hits += 1
+            return profile
+
+        task = self._pending.get(player_id)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(player_id))
+            self._pending[player_id] = task
+
+        # Shielded so one cancelled caller doesn't cancel the fetch for everyone waiting on it
+        return await asyncio.shield(task)
+
+    async def get_many(self, player_ids):
+        ids = list(dict.fromkeys(player_ids))
+        results = await asyncio.gather(*(self.get(pid) for pid in ids), return_exceptions=True)
+        return dict(zip(ids, results))
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self._entries),
+        }
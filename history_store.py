@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import time
+
+STAT_COLUMNS = ("nickname", "experience", "level", "kills", "deaths", "raids", "survived", "time_played")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS player_stats (
+    player_id   TEXT    NOT NULL,
+    updated     INTEGER NOT NULL,
+    recorded_at INTEGER NOT NULL,
+    nickname    TEXT,
+    experience  INTEGER NOT NULL DEFAULT 0,
+    level       INTEGER NOT NULL DEFAULT 1,
+    kills       INTEGER NOT NULL DEFAULT 0,
+    deaths      INTEGER NOT NULL DEFAULT 0,
+    raids       INTEGER NOT NULL DEFAULT 0,
+    survived    INTEGER NOT NULL DEFAULT 0,
+    time_played INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (player_id, updated)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS skill_progress (
+    player_id TEXT    NOT NULL,
+    updated   INTEGER NOT NULL,
+    skill_id  TEXT    NOT NULL,
+    progress  REAL    NOT NULL,
+    PRIMARY KEY (player_id, updated, skill_id)
+) WITHOUT ROWID;
+"""
+
+
+class HistoryStore:
+    # Both primary keys lead with (player_id, updated), so range queries per player are index scans
+    def __init__(self, path="./snapshots/history.db"):
+        self.path = path
+        self._pending = []
+        self._conn = None
+
+    def connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def record(self, player_id, updated, stats, skills=None):
+        # Buffered until flush() so a whole sweep lands in one transaction
+        self._pending.append((str(player_id), int(updated or 0), stats, skills or {}))
+
+    def flush(self):
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, []
+        now = int(time.time() * 1000)
+        conn = self.connect()
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO player_stats (player_id, updated, recorded_at, {', '.join(STAT_COLUMNS)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' for _ in STAT_COLUMNS)})",
+                [(pid, updated, now, *(stats.get(col) for col in STAT_COLUMNS)) for pid, updated, stats, _ in pending],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO skill_progress (player_id, updated, skill_id, progress) VALUES (?, ?, ?, ?)",
+                [(pid, updated, skill_id, progress)
+                 for pid, updated, _, skills in pending
+                 for skill_id, progress in skills.items()],
+            )
+        return len(pending)
+
+    def latest(self, player_id):
+        return self.connect().execute(
+            "SELECT * FROM player_stats WHERE player_id = ? ORDER BY updated DESC LIMIT 1",
+            (str(player_id),),
+        ).fetchone()
+
+    def baseline(self, player_id, since):
+        # Last row at or before `since`, falling back to the first row after it
+        conn = self.connect()
+        row = conn.execute(
+            "SELECT * FROM player_stats WHERE player_id = ? AND updated <= ? ORDER BY updated DESC LIMIT 1",
+            (str(player_id), int(since)),
+        ).fetchone()
+        if row is None:
+            row = conn.execute(
+                "SELECT * FROM player_stats WHERE player_id = ? AND updated > ? ORDER BY updated ASC LIMIT 1",
+                (str(player_id), int(since)),
+            ).fetchone()
+        return row
+
+    def delta(self, player_id, since):
+        latest = self.latest(player_id)
+        base = self.baseline(player_id, since)
+        if latest is None or base is None:
+            return None
+        result = {col: latest[col] - base[col] for col in STAT_COLUMNS if col != "nickname"}
+        result["from"] = base["updated"]
+        result["to"] = latest["updated"]
+        return result
+
+    def deltas(self, since):
+        # Roster-wide version of delta(): one grouped query instead of two per player
+        rows = self.connect().execute(
+            """
+            WITH bounds AS (
+                SELECT player_id,
+                       MAX(updated) AS last,
+                       COALESCE(MAX(CASE WHEN updated <= :since THEN updated END),
+                                MIN(CASE WHEN updated > :since THEN updated END)) AS first
+                FROM player_stats GROUP BY player_id
+            )
+            SELECT b.player_id, b.first, b.last,
+                   l.experience - f.experience AS experience,
+                   l.kills - f.kills AS kills,
+                   l.deaths - f.deaths AS deaths,
+                   l.raids - f.raids AS raids,
+                   l.survived - f.survived AS survived,
+                   l.time_played - f.time_played AS time_played,
+                   l.level - f.level AS level
+            FROM bounds b
+            JOIN player_stats l ON l.player_id = b.player_id AND l.updated = b.last
+            JOIN player_stats f ON f.player_id = b.player_id AND f.updated = b.first
+            """,
+            {"since": int(since)},
+        ).fetchall()
+        return {row["player_id"]: dict(row) for row in rows}
+
+    def history(self, player_id, since=0):
+        return self.connect().execute(
+            "SELECT * FROM player_stats WHERE player_id = ? AND updated >= ? ORDER BY updated",
+            (str(player_id), int(since)),
+        ).fetchall()
+
+    def skill_history(self, player_id, skill_id, since=0):
+        return self.connect().execute(
+            "SELECT updated, progress FROM skill_progress "
+            "WHERE player_id = ? AND updated >= ? AND skill_id = ? ORDER BY updated",
+            (str(player_id), int(since), skill_id),
+        ).fetchall()
+
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
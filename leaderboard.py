@@ -0,0 +1,103 @@
+import numpy as np
+
+LEADERBOARD_METRICS = {
+    "kd": ("K/D", "{:.2f}"),
+    "level": ("Level", "{:.0f}"),
+    "sr": ("S/R", "{:.1f}%"),
+    "hours": ("Hours Played", "{:,.1f}"),
+    "xp_week": ("XP Gained This Week", "{:,.0f}"),
+}
+
+METRIC_ALIASES = {
+    "k/d": "kd", "kdr": "kd",
+    "lvl": "level",
+    "s/r": "sr", "survival": "sr",
+    "time": "hours", "played": "hours",
+    "xp": "xp_week", "week": "xp_week", "weekly": "xp_week",
+}
+
+
+class StatsTable:
+    # One NumPy column per metric, one row per tracked player; rows are swap-removed
+    def __init__(self, columns=("kd", "level", "sr", "hours", "xp_week"), capacity=64):
+        self.columns = {name: np.zeros(capacity) for name in columns}
+        self.player_ids = []
+        self.nicknames = []
+        self.rows = {}
+        self.version = 0
+        self._rankings = {}
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def _grow(self):
+        for name, column in self.columns.items():
+            self.columns[name] = np.concatenate([column, np.zeros(len(column))])
+
+    def upsert(self, player_id, nickname, values):
+        row = self.rows.get(player_id)
+        if row is None:
+            row = len(self.player_ids)
+            if row == len(next(iter(self.columns.values()))):
+                self._grow()
+            self.rows[player_id] = row
+            self.player_ids.append(player_id)
+            self.nicknames.append(nickname)
+        else:
+            self.nicknames[row] = nickname
+        for name, value in values.items():
+            self.columns[name][row] = value
+        self.version += 1
+
+    def set_column(self, name, values):
+        column = self.columns[name]
+        column[:len(self.player_ids)] = 0
+        for player_id, value in values.items():
+            row = self.rows.get(player_id)
+            if row is not None:
+                column[row] = value
+        self.version += 1
+
+    def remove(self, player_id):
+        row = self.rows.pop(player_id, None)
+        if row is None:
+            return
+        last = len(self.player_ids) - 1
+        if row != last:
+            moved = self.player_ids[last]
+            self.player_ids[row] = moved
+            self.nicknames[row] = self.nicknames[last]
+            self.rows[moved] = row
+            for column in self.columns.values():
+                column[row] = column[last]
+        # The vacated row is reused by the next upsert, which may not set every column
+        for column in self.columns.values():
+            column[last] = 0
+        self.player_ids.pop()
+        self.nicknames.pop()
+        self.version += 1
+
+    def ranking(self, metric, limit=10, key=None, players=None):
+        # Cached per metric until any row changes; `key` lets callers add their own staleness check
+        # and must identify `players`, which limits the ranking to those rows when given
+        cache_key = (metric, limit, key)
+        cached = self._rankings.get(cache_key)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+
+        values = self.columns[metric][:len(self.player_ids)]
+        if players is None:
+            order = np.argsort(-values, kind="stable")[:limit]
+        else:
+            rows = np.array(sorted(self.rows[p] for p in players if p in self.rows), dtype=np.intp)
+            order = rows[np.argsort(-values[rows], kind="stable")[:limit]]
+        result = [(self.player_ids[i], self.nicknames[i], float(values[i])) for i in order]
+        self._rankings = {k: v for k, v in self._rankings.items() if v[0] == self.version}
+        self._rankings[cache_key] = (self.version, result)
+        return result
+
+
+def normalize_metric(name):
+    name = (name or "kd").strip().lower()
+    name = METRIC_ALIASES.get(name, name)
+    return name if name in LEADERBOARD_METRICS else None
@@ -0,0 +1,18 @@
+from bisect import bisect_right
+
+XP_LEVELS = [
+    0, 1000, 4017, 8432, 14256, 21477, 30023, 39936, 51204, 63723,
+    77563, 92713, 111881, 134674, 161139, 191417, 225194, 262366, 302484, 345751,
+    391649, 440444, 492366, 547896, 609066, 679255, 755444, 837672, 925976, 1020396,
+    1120969, 1227735, 1344260, 1470605, 1606833, 1759965, 1923579, 2097740, 2282513, 2477961,
+    2684149, 2901143, 3132824, 3379281, 3640603, 3929436, 4233995, 4554372, 4890662, 5242956,
+    5611348, 5995931, 6402287, 6830542, 7280825, 7753260, 8247975, 8765097, 9304752, 9876880,
+    10512365, 11193911, 11929835, 12727177, 13615989, 14626588, 15864243, 17555001, 19926895,
+    22926895, 26526895, 30726895, 35526895, 40926895, 46926895, 53526895, 60726895, 69126895,
+    81126895
+]
+
+
+def calculate_level_from_experience(exp):
+    # XP_LEVELS[i] is the total XP needed for level i + 1
+    return max(bisect_right(XP_LEVELS, exp), 1)
@@ -0,0 +1,185 @@
+import collections
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+from aiohttp import web
+
+# Upper bounds in seconds, Prometheus style; the last bucket is +Inf
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        # Linear interpolation inside the bucket holding the rank, capped at the observed max
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+
+class Span:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        if exc_type is not None:
+            self.metrics.inc("stage_errors", stage=self.stage)
+        return False
+
+
+class Metrics:
+    # Per-stage latency histograms plus labelled counters, rendered for !botstats or Prometheus
+    def __init__(self, prefix="pvestats"):
+        self.prefix = prefix
+        self.started = time.time()
+        self.histograms = {}
+        self.counters = collections.Counter()  # (name, sorted label items) -> value
+        self._gauges = []
+
+    def span(self, stage):
+        return Span(self, stage)
+
+    def observe(self, stage, seconds):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def counter(self, name, **labels):
+        if labels:
+            return self.counters[(name, tuple(sorted(labels.items())))]
+        return sum(v for (n, _), v in self.counters.items() if n == name)
+
+    def labelled(self, name):
+        return {labels: value for (n, labels), value in self.counters.items() if n == name}
+
+    def add_gauges(self, collect):
+        # `collect` returns {name: value} and is only called when metrics are rendered
+        self._gauges.append(collect)
+
+    def gauges(self):
+        values = {"uptime_seconds": time.time() - self.started}
+        for collect in self._gauges:
+            values.update(collect())
+        return values
+
+    def render(self):
+        def fmt_labels(labels):
+            return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+        lines = [f"# TYPE {self.prefix}_stage_seconds histogram"]
+        for stage, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f'{self.prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.prefix}_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+            lines.append(f'{self.prefix}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        names = sorted({name for name, _ in self.counters})
+        for name in names:
+            lines.append(f"# TYPE {self.prefix}_{name}_total counter")
+            for labels, value in sorted(self.labelled(name).items()):
+                lines.append(f"{self.prefix}_{name}_total{fmt_labels(labels)} {value}")
+
+        for name, value in sorted(self.gauges().items()):
+            lines.append(f"# TYPE {self.prefix}_{name} gauge")
+            lines.append(f"{self.prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+async def start_metrics_server(metrics, host="127.0.0.1", port=9108):
+    async def handle(request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+class StackSampler:
+    # Samples the event-loop thread's stack from a background thread; cheap enough to leave on for a sweep
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def top(self, n=10, inclusive=False):
+        # Leaf ("self") samples by default; inclusive counts every function on the stack
+        totals = collections.Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            for function in set(frames) if inclusive else frames[-1:]:
+                totals[function] += count
+        return totals.most_common(n)
+
+    def write_folded(self, path):
+        # One "a;b;c count" line per stack, the input format flamegraph.pl and speedscope expect
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import os
+
+from snapshot_store import atomic_write
+
+
+class JsonDocument:
+    # In-memory JSON document with debounced, off-loop, atomic flushes
+    def __init__(self, path, debounce=2.0):
+        self.path = path
+        self.debounce = debounce
+        self.data = self._load()
+        self.flushes = 0
+        self._dirty = False
+        self._timer = None
+        self._flush_task = None
+        self._write_lock = asyncio.Lock()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                return json.load(f)
+        return {}
+
+    def mark_dirty(self):
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(self._serialize())
+            return
+        # Everything changed within the debounce window lands in a single write
+        if self._timer is None:
+            self._timer = loop.call_later(self.debounce, self._start_flush)
+
+    def _start_flush(self):
+        self._timer = None
+        self._flush_task = asyncio.create_task(self.flush())
+
+    def _serialize(self):
+        self._dirty = False
+        return json.dumps(self.data, indent=2).encode()
+
+    def _write(self, payload):
+        atomic_write(self.path, payload)
+        self.flushes += 1
+
+    async def flush(self):
+        async with self._write_lock:
+            if not self._dirty:
+                return
+            # Serialized on the loop so the file always matches one consistent state
+            payload = self._serialize()
+            try:
+                await asyncio.to_thread(self._write, payload)
+            except Exception:
+                self._dirty = True
+                raise
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
@@ -0,0 +1,108 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+
+import aiohttp
+
+from snapshot_store import atomic_write
+
+INDEX_URL = "https://players.tarkov.dev/profile/index.json"
+# The shared session's timeout is sized for single profiles; the index is many MB, so only stalls count
+INDEX_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+
+
+class PlayerIndex:
+    # Local copy of the upstream id -> nickname index, refreshed conditionally
+    def __init__(self, url=INDEX_URL, directory="./snapshots", max_age=24 * 3600):
+        self.url = url
+        self.data_path = os.path.join(directory, "player_index.json.gz")
+        self.meta_path = os.path.join(directory, "player_index_meta.json")
+        self.max_age = max_age
+        self.by_id = {}
+        self.by_name = {}
+        self.validators = {}
+        self.refreshed_at = 0
+        self._refreshing = None
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def _build(self, body):
+        raw = json.loads(body)
+        by_id = {}
+        by_name = {}
+        for player_id, nickname in raw.items():
+            if not isinstance(nickname, str):
+                continue
+            player_id = int(player_id)
+            by_id[player_id] = nickname
+            by_name.setdefault(nickname.lower(), player_id)
+        return by_id, by_name
+
+    async def load(self):
+        if not os.path.exists(self.data_path):
+            return False
+        with open(self.data_path, "rb") as f:
+            body = gzip.decompress(f.read())
+        # Large index: keep parsing off the event loop
+        self.by_id, self.by_name = await asyncio.to_thread(self._build, body)
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+            self.validators = meta.get("validators", {})
+            self.refreshed_at = meta.get("refreshed_at", 0)
+        return True
+
+    def _save_meta(self):
+        payload = json.dumps({"validators": self.validators, "refreshed_at": self.refreshed_at}).encode()
+        atomic_write(self.meta_path, payload)
+
+    @property
+    def stale(self):
+        return not self.by_id or time.time() - self.refreshed_at > self.max_age
+
+    async def refresh(self, session):
+        # Concurrent callers share one download
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._refresh(session))
+            self._refreshing.add_done_callback(lambda _: setattr(self, "_refreshing", None))
+        return await asyncio.shield(self._refreshing)
+
+    async def _refresh(self, session):
+        headers = {}
+        if self.by_id and self.validators.get("etag"):
+            headers["If-None-Match"] = self.validators["etag"]
+        if self.by_id and self.validators.get("last_modified"):
+            headers["If-Modified-Since"] = self.validators["last_modified"]
+
+        async with session.get(self.url, headers=headers, timeout=INDEX_TIMEOUT) as res:
+            if res.status == 304:
+                self.refreshed_at = time.time()
+                self._save_meta()
+                print(f"📇 Player index unchanged ({len(self.by_id):,} players).")
+                return False
+            res.raise_for_status()
+            body = await res.read()
+            self.validators = {
+                "etag": res.headers.get("ETag"),
+                "last_modified": res.headers.get("Last-Modified"),
+            }
+
+        self.by_id, self.by_name = await asyncio.to_thread(self._build, body)
+        self.refreshed_at = time.time()
+        await asyncio.to_thread(atomic_write, self.data_path, gzip.compress(body, 6))
+        self._save_meta()
+        print(f"📇 Player index refreshed: {len(self.by_id):,} players, {len(body) / 1024 / 1024:,.1f} MB.")
+        return True
+
+    def nickname(self, player_id):
+        try:
+            return self.by_id.get(int(player_id))
+        except (TypeError, ValueError):
+            return None
+
+    def find(self, nickname):
+        player_id = self.by_name.get(nickname.strip().lower())
+        return str(player_id) if player_id is not None else None
@@ -0,0 +1,116 @@
+from functools import cached_property
+
+from levels import calculate_level_from_experience
+from skill_vectors import SkillVector, diff_vectors
+
+KILLS = ("Kills",)
+DEATHS = ("Deaths",)
+PMC_RAIDS = ("Sessions", "Pmc")
+SURVIVED = ("ExitStatus", "Survived", "Pmc")
+WIN_STREAK = ("LongestWinStreak", "Pmc")
+
+
+class ParsedProfile:
+    # Wraps a raw tarkov.dev profile (or compact snapshot) and indexes it once
+    def __init__(self, data):
+        self.raw = data
+        info = data.get("info", {})
+        eft = data.get("pmcStats", {}).get("eft", {})
+
+        self.updated = data.get("updated")
+        self.nickname = info.get("nickname", "Unknown")
+        self.side = info.get("side", "Unknown")
+        self.experience = info.get("experience", 0)
+        self.time_played = eft.get("totalInGameTime", 0)
+        self.counters = {
+            tuple(item["Key"]): item["Value"]
+            for item in eft.get("overAllCounters", {}).get("Items", [])
+        }
+
+        # Compact snapshots carry pre-built vectors, raw profiles carry Id/Progress lists
+        vectors = data.get("vectors")
+        if vectors is not None:
+            self.common = SkillVector.from_dict(vectors["common"])
+            self.mastery = SkillVector.from_dict(vectors["mastery"])
+        else:
+            skills = data.get("skills", {})
+            self.common = SkillVector.from_entries(skills.get("Common", []))
+            self.mastery = SkillVector.from_entries(skills.get("Mastering", []))
+
+        # Compact snapshots only keep the number of achievements
+        if "achievementCount" in data:
+            self.achievements = data["achievementCount"]
+        else:
+            self.achievements = len(data.get("achievements", {}))
+
+    def counter(self, *key):
+        return self.counters.get(key, 0)
+
+    @cached_property
+    def level(self):
+        return calculate_level_from_experience(self.experience)
+
+    @property
+    def kills(self):
+        return self.counters.get(KILLS, 0)
+
+    @property
+    def deaths(self):
+        return self.counters.get(DEATHS, 0)
+
+    @property
+    def pmc_raids(self):
+        return self.counters.get(PMC_RAIDS, 0)
+
+    @property
+    def survived(self):
+        return self.counters.get(SURVIVED, 0)
+
+    @property
+    def win_streak(self):
+        return self.counters.get(WIN_STREAK, 0)
+
+    @property
+    def kd_ratio(self):
+        deaths = self.deaths
+        return self.kills / deaths if deaths else 0
+
+    @property
+    def sr_ratio(self):
+        raids = self.pmc_raids
+        return (self.survived / raids) * 100 if raids else 0
+
+    @property
+    def hours_played(self):
+        return self.time_played / 3600
+
+    @cached_property
+    def skill_progress(self):
+        return self.common.as_dict()
+
+    def stats(self):
+        return {
+            "nickname": self.nickname,
+            "experience": self.experience,
+            "level": self.level,
+            "kills": self.kills,
+            "deaths": self.deaths,
+            "raids": self.pmc_raids,
+            "survived": self.survived,
+            "time_played": self.time_played,
+        }
+
+
+def diff_stats(current, previous):
+    result = {"experience": None, "skills": [], "mastery": []}
+    if current.experience != previous.experience:
+        result["experience"] = {
+            "from": previous.experience,
+            "to": current.experience,
+            "diff": current.experience - previous.experience
+        }
+
+    result["skills"], result["skills_added"], result["skills_removed"] = diff_vectors(current.common, previous.common)
+    result["mastery"], result["mastery_added"], result["mastery_removed"] = diff_vectors(current.mastery, previous.mastery)
+
+    return result
@@ -0,0 +1,110 @@
+import json
+import os
+import time
+import zlib
+
+from snapshot_store import atomic_write
+
+ACTIVE_WINDOW = 24 * 3600
+DORMANT_AFTER = 7 * 24 * 3600
+
+
+class PollScheduler:
+    # Spreads the roster over `slots` ticks per interval instead of one burst per interval
+    def __init__(self, interval=3 * 3600, slots=36, store_path="./snapshots/poll_schedule.json",
+                 active_window=ACTIVE_WINDOW, dormant_after=DORMANT_AFTER):
+        self.interval = interval
+        self.slots = slots
+        self.tick_seconds = interval / slots
+        self.store_path = store_path
+        self.active_window = active_window
+        self.dormant_after = dormant_after
+        self.players = {}  # player_id -> {"slot", "last_change", "last_polled"}
+        self.last_tick = None  # last tick take_due() handed out, so skipped ticks are caught up
+        self._dirty = False
+
+    def load(self):
+        if os.path.exists(self.store_path):
+            with open(self.store_path, "r") as f:
+                state = json.load(f)
+            # Slots from a different slot count can't be reused, so reassign them
+            if state.get("slots") == self.slots:
+                self.players = state.get("players", {})
+                self.last_tick = state.get("last_tick")
+
+    def save(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+        state = {"slots": self.slots, "last_tick": self.last_tick, "players": self.players}
+        atomic_write(self.store_path, json.dumps(state).encode())
+
+    def slot_for(self, player_id):
+        # crc32 rather than hash() so the slot is identical across restarts
+        return zlib.crc32(str(player_id).encode()) % self.slots
+
+    def add(self, player_id):
+        if player_id not in self.players:
+            self.players[player_id] = {"slot": self.slot_for(player_id), "last_change": None, "last_polled": None}
+            self._dirty = True
+
+    def remove(self, player_id):
+        if self.players.pop(player_id, None) is not None:
+            self._dirty = True
+
+    def sync(self, player_ids):
+        player_ids = set(player_ids)
+        for player_id in player_ids:
+            self.add(player_id)
+        for player_id in list(self.players):
+            if player_id not in player_ids:
+                self.remove(player_id)
+
+    def current_tick(self, now=None):
+        return int((now or time.time()) // self.tick_seconds)
+
+    def period_for(self, state, now):
+        # Period in ticks: active players twice per interval, dormant ones every fourth interval
+        last_change = state.get("last_change")
+        if last_change is None:
+            return self.slots
+        idle = now - last_change
+        if idle < self.active_window:
+            return max(1, self.slots // 2)
+        if idle > self.dormant_after:
+            return self.slots * 4
+        return self.slots
+
+    def take_due(self, now=None):
+        # Everyone due in any tick since the last call, so a tick skipped while the previous sweep
+        # ran (or the loop stalled) isn't lost. At most one interval is caught up after downtime
+        now = now or time.time()
+        tick = self.current_tick(now)
+        first = tick if self.last_tick is None else max(self.last_tick + 1, tick - self.slots + 1)
+        if first > tick:
+            return []
+        due = []
+        for player_id, state in self.players.items():
+            # First tick >= `first` in this player's phase
+            next_tick = first + (state["slot"] - first) % self.period_for(state, now)
+            if next_tick <= tick:
+                due.append(player_id)
+        self.last_tick = tick
+        self._dirty = True
+        return due
+
+    def mark(self, player_id, changed, now=None):
+        state = self.players.get(player_id)
+        if state is None:
+            return
+        now = now or time.time()
+        state["last_polled"] = now
+        if changed:
+            state["last_change"] = now
+        self._dirty = True
+
+    def slot_loads(self):
+        loads = [0] * self.slots
+        for state in self.players.values():
+            loads[state["slot"]] += 1
+        return loads
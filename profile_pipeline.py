@@ -0,0 +1,106 @@
+import asyncio
+import json
+import multiprocessing
+import sys
+import sysconfig
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from embeds import format_embed
+from metrics import Metrics
+from player_profile import ParsedProfile, diff_stats
+from snapshot_store import SnapshotStore, compact_profile
+
+
+class ProfileUpdate:
+    # Picklable result of analyze_profile: everything the loop needs for the Discord I/O and the writes
+    def __init__(self, player_id, status, profile, diff=None, embeds=None, snapshot=None, timings=None):
+        self.player_id = player_id
+        self.status = status  # "initial", "changed" or "unchanged"
+        self.profile = profile  # ParsedProfile over the compact snapshot data
+        self.diff = diff
+        self.embeds = embeds or []  # Embed.to_dict() payloads
+        self.snapshot = snapshot  # gzip payload for SnapshotStore.write
+        self.timings = timings or {}
+
+
+def analyze_profile(player_id, snapshot_dir, data=None, body=None, decode=json.loads):
+    # Pure CPU work plus one snapshot read; safe to run in another process
+    metrics = Metrics()
+    store = SnapshotStore(snapshot_dir)
+
+    with metrics.span("parse"):
+        if data is None:
+            data = decode(body)
+        latest = ParsedProfile(compact_profile(data))
+        del data, body
+
+    with metrics.span("snapshot_load"):
+        previous = store.load(player_id)
+
+    if previous is not None:
+        with metrics.span("parse"):
+            previous = ParsedProfile(previous)
+        if previous.updated == latest.updated:
+            return ProfileUpdate(player_id, "unchanged", latest, timings=_timings(metrics))
+
+    with metrics.span("snapshot_encode"):
+        snapshot = store.encode(latest.raw)
+
+    if previous is None:
+        return ProfileUpdate(player_id, "initial", latest, snapshot=snapshot, timings=_timings(metrics))
+
+    with metrics.span("diff_stats"):
+        diff = diff_stats(latest, previous)
+    with metrics.span("format_embed"):
+        embeds = [embed.to_dict() for embed in format_embed(latest, diff, player_id, previous)]
+    return ProfileUpdate(player_id, "changed", latest, diff, embeds, snapshot, _timings(metrics))
+
+
+def _timings(metrics):
+    return {stage: histogram.sum for stage, histogram in metrics.histograms.items()}
+
+
+def free_threaded():
+    return bool(sysconfig.get_config_var("Py_GIL_DISABLED")) and not sys._is_gil_enabled()
+
+
+class ProfilePipeline:
+    # Runs analyze_profile inline, or in a worker pool so parsing and embed building stay off the event loop
+    def __init__(self, snapshot_dir, workers=0, decode=json.loads):
+        self.snapshot_dir = snapshot_dir
+        self.workers = workers
+        self.decode = decode
+        self._executor = None
+
+    @property
+    def mode(self):
+        if not self.workers:
+            return "inline"
+        return "threads" if free_threaded() else "processes"
+
+    def start(self):
+        if not self.workers or self._executor is not None:
+            return
+        if free_threaded():
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="profile-worker")
+        else:
+            # spawn, not fork: the bot process has aiohttp and scheduler threads that a fork would copy mid-flight
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            # Workers import this module (and discord) up front instead of during the first sweep
+            for _ in range(self.workers):
+                self._executor.submit(free_threaded)
+
+    async def analyze(self, fetched):
+        data = fetched.parsed.raw if fetched.parsed is not None else fetched.data
+        body = fetched.body if data is None else None
+        if self._executor is None:
+            return analyze_profile(fetched.player_id, self.snapshot_dir, data, body, self.decode)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, analyze_profile, fetched.player_id, self.snapshot_dir, data, body, self.decode
+        )
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
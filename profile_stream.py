@@ -0,0 +1,295 @@
+import codecs
+import json
+import re
+
+from skill_vectors import SkillVector
+from snapshot_store import INFO_FIELDS, TRACKED_COUNTERS
+
+KEEP = "keep"
+COUNT = "count"
+COUNTERS = "counters"
+
+# The parts of a tarkov.dev profile the bot reads; everything else is skipped without being built
+PROFILE_FIELDS = {
+    "id": KEEP,
+    "updated": KEEP,
+    "info": KEEP,
+    "skills": KEEP,
+    "achievements": COUNT,
+    "pmcStats": {"eft": {"totalInGameTime": KEEP, "overAllCounters": {"Items": COUNTERS}}},
+}
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+_STRING = r'"(?:[^"\\]++|\\.)*+"'
+_string = re.compile(_STRING)
+_scalar = re.compile(r"[^,}\]\s]+")
+
+
+def _nested(levels):
+    # A complete array or object at most `levels` deep; valid input is assumed, so [ } isn't rejected
+    inner = rf'(?:[^"\[\]{{}}]++|{_STRING})*+'
+    for _ in range(levels):
+        inner = rf'(?:[^"\[\]{{}}]++|{_STRING}|[\[{{]{inner}[\]}}])*+'
+    return inner
+
+
+# Runs to the next bracket (or comma), stepping over whole strings and shallow containers in one
+# match; a lone quote means a string was cut off at the end of the chunk
+_skip_token = re.compile(rf'(?:[^"\[\]{{}}]++|{_STRING}|[\[{{]{_nested(2)}[\]}}])*+([\[\]{{}}"])')
+_count_token = re.compile(rf'(?:[^"\[\]{{}},]++|{_STRING}|[\[{{]{_nested(2)}[\]}}])*+([\[\]{{}},"])')
+_WS = r"[ \t\n\r]*"
+_NUMBER = r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?"
+
+
+def _item_pattern(key, value):
+    # One overAllCounters item in its usual {"Key": [...], "Value": n} shape; anything else takes the slow path
+    return rf'{_WS}\{{{_WS}"Key"{_WS}:{_WS}\[{_WS}{key}\]{_WS},{_WS}"Value"{_WS}:{_WS}{value}{_WS}\}}'
+
+
+_counter_item = re.compile(_WS + "(,?)" + _item_pattern(r'"([^"\\]*)"([^\]]*)', f"({_NUMBER})"))
+_key_part = re.compile(r'"([^"\\]*)"')
+
+
+def _untracked_counters(keys):
+    # Consumes a whole run of `,{item}` whose key isn't tracked in one C-level match
+    tracked = "|".join(f"{_WS},{_WS}".join(f'"{re.escape(part)}"' for part in key) + _WS + r"\]" for key in sorted(keys))
+    item = _item_pattern(rf'(?!(?:{tracked}))"[^"\\]*"[^\]]*', _NUMBER)
+    return re.compile(f"(?:{_WS},{item})*+")
+
+
+class ProfileExtractor:
+    # Incremental parser: feed() response chunks as they arrive, close() returns the compact profile.
+    # Only the fields in PROFILE_FIELDS are ever materialised; the consumed input is dropped as it goes.
+    def __init__(self, fields=PROFILE_FIELDS, counters=TRACKED_COUNTERS, compact_at=1 << 16):
+        self.fields = fields
+        self.wanted_counters = {tuple(key) for key in counters}
+        self._untracked_run = _untracked_counters(self.wanted_counters)
+        self.compact_at = compact_at
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+        self.result = {}
+        self.peak_buffer = 0
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._parser = self._parse()
+        next(self._parser)
+
+    def feed(self, chunk):
+        if self.pos >= self.compact_at:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        self.text += self._utf8.decode(chunk)
+        self.peak_buffer = max(self.peak_buffer, len(self.text))
+        self._resume()
+
+    def close(self):
+        self.text += self._utf8.decode(b"", final=True)
+        self.eof = True
+        self._resume()
+        if self._parser is not None:
+            raise ValueError("Truncated profile JSON")
+        return self.result
+
+    def _resume(self):
+        if self._parser is None:
+            return
+        try:
+            self._parser.send(None)
+        except StopIteration:
+            self._parser = None
+
+    # Each step below is a generator that yields whenever the buffer runs dry
+
+    def _ws(self):
+        while True:
+            self.pos = _whitespace.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if self.eof:
+                raise ValueError("Unexpected end of profile JSON")
+            yield
+
+    def _expect(self, char):
+        found = yield from self._ws()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at {self.pos}, found {found!r}")
+        self.pos += 1
+
+    def _value(self):
+        # Whole-value decode in C once the value is complete; retried as more data arrives
+        yield from self._ws()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                yield
+                continue
+            # A number running to the end of the buffer may continue in the next chunk: "12" then "3",
+            # or "98." then "5", where raw_decode stops short of the buffer end
+            if not self.eof and self.text[self.pos] not in '{["' and _scalar.match(self.text, self.pos).end() == len(self.text):
+                yield
+                continue
+            self.pos = end
+            return value
+
+    def _skip(self):
+        first = yield from self._ws()
+        if first not in "{[":
+            pattern = _string if first == '"' else _scalar
+            while True:
+                match = pattern.match(self.text, self.pos)
+                # A scalar at the very end of the buffer may continue in the next chunk
+                if match is not None and (first == '"' or match.end() < len(self.text) or self.eof):
+                    self.pos = match.end()
+                    return
+                if self.eof:
+                    raise ValueError("Unexpected end of profile JSON")
+                yield
+        self.pos += 1
+        depth = 1
+        while True:
+            token = yield from self._token(_skip_token)
+            depth += 1 if token in "{[" else -1
+            if depth == 0:
+                return
+
+    def _token(self, pattern):
+        while True:
+            match = pattern.match(self.text, self.pos)
+            if match is not None and match.group(1) != '"':
+                self.pos = match.end()
+                return match.group(1)
+            if self.eof:
+                raise ValueError("Unexpected end of profile JSON")
+            self.pos = len(self.text) if match is None else match.start(1)
+            yield
+
+    def _members(self):
+        # Yields each key of an object, with the cursor left on its value
+        yield from self._expect("{")
+        first = True
+        while True:
+            char = yield from self._ws()
+            if char == "}":
+                self.pos += 1
+                return
+            if not first:
+                yield from self._expect(",")
+            first = False
+            key = yield from self._value()
+            yield from self._expect(":")
+            yield key
+
+    def _object(self, spec, out):
+        # Manual iteration: _members() yields both "need more data" (None) and keys (str)
+        members = self._members()
+        while True:
+            try:
+                key = next(members)
+            except StopIteration:
+                return
+            if key is None:
+                yield
+                continue
+            action = spec.get(key)
+            if action is None:
+                yield from self._skip()
+            elif action == KEEP:
+                out[key] = yield from self._value()
+            elif (yield from self._ws()) == "n":
+                # A null section is left out, the same as compact_profile treats it
+                yield from self._skip()
+            elif action == COUNT:
+                out[key] = yield from self._count()
+            elif action == COUNTERS:
+                out[key] = yield from self._counters()
+            else:
+                yield from self._object(action, out.setdefault(key, {}))
+
+    def _count(self):
+        # Number of members of an object or array: its top-level commas, nothing is decoded
+        yield from self._ws()
+        self.pos += 1
+        char = yield from self._ws()
+        if char in "}]":
+            self.pos += 1
+            return 0
+        count = depth = 1
+        while True:
+            token = yield from self._token(_count_token)
+            if token == ",":
+                count += depth == 1
+            elif token in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return count
+
+    def _counters(self):
+        # overAllCounters.Items: untracked items are skipped a whole run at a time, only tracked ones get decoded
+        yield from self._expect("[")
+        kept = []
+        first = True
+        while True:
+            if not first:
+                self.pos = self._untracked_run.match(self.text, self.pos).end()
+            match = _counter_item.match(self.text, self.pos)
+            if match is not None and bool(match.group(1)) != first and "\\" not in match.group(3):
+                self.pos = match.end()
+                first = False
+                key = (match.group(2), *_key_part.findall(match.group(3)))
+                if key in self.wanted_counters:
+                    kept.append({"Key": list(key), "Value": json.loads(match.group(4))})
+                continue
+
+            char = yield from self._ws()
+            if char == "]":
+                self.pos += 1
+                return kept
+            if not first:
+                yield from self._expect(",")
+            first = False
+            item = yield from self._value()
+            if tuple(item["Key"]) in self.wanted_counters:
+                kept.append({"Key": item["Key"], "Value": item["Value"]})
+
+    def _parse(self):
+        yield
+        raw = {}
+        yield from self._object(self.fields, raw)
+        self.result = compact_extracted(raw)
+
+
+def compact_extracted(raw):
+    # Same shape as snapshot_store.compact_profile, built from the extracted fields only
+    info = raw.get("info") or {}
+    skills = raw.get("skills") or {}
+    eft = raw.get("pmcStats", {}).get("eft", {})
+    return {
+        "id": raw.get("id"),
+        "updated": raw.get("updated"),
+        "info": {field: info[field] for field in INFO_FIELDS if field in info},
+        "vectors": {
+            "common": SkillVector.from_entries(skills.get("Common") or []).to_dict(),
+            "mastery": SkillVector.from_entries(skills.get("Mastering") or []).to_dict(),
+        },
+        "pmcStats": {
+            "eft": {
+                "totalInGameTime": eft.get("totalInGameTime", 0),
+                "overAllCounters": {"Items": eft.get("overAllCounters", {}).get("Items", [])},
+            }
+        },
+        "achievementCount": raw.get("achievements", 0),
+    }
+
+
+def extract_profile(body, chunk_size=1 << 16):
+    extractor = ProfileExtractor()
+    view = memoryview(body)
+    for start in range(0, len(view), chunk_size):
+        extractor.feed(view[start:start + chunk_size])
+    return extractor.close()
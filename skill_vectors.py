@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class SkillVector:
+    # Skill/mastery progress as a sorted id tuple plus an aligned float64 array
+    __slots__ = ("ids", "progress")
+
+    def __init__(self, ids, progress):
+        self.ids = tuple(ids)
+        self.progress = np.asarray(progress, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_entries(cls, entries):
+        ordered = sorted((e["Id"], e["Progress"]) for e in entries)
+        return cls([i for i, _ in ordered], [p for _, p in ordered])
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["ids"], data["progress"])
+
+    def to_dict(self):
+        return {"ids": list(self.ids), "progress": self.progress.tolist()}
+
+    def as_dict(self):
+        return dict(zip(self.ids, self.progress.tolist()))
+
+    def top(self, n):
+        order = np.argsort(-self.progress, kind="stable")[:n]
+        return [(self.ids[i], float(self.progress[i])) for i in order]
+
+
+def diff_vectors(current, previous):
+    if current.ids == previous.ids:
+        # Common case: same skill set, one subtraction and a nonzero mask
+        delta = current.progress - previous.progress
+        changed = np.flatnonzero(delta)
+        changes = [
+            {"id": current.ids[i], "from": float(previous.progress[i]),
+             "to": float(current.progress[i]), "diff": float(delta[i])}
+            for i in changed
+        ]
+        return changes, [], []
+
+    prev_index = {sid: i for i, sid in enumerate(previous.ids)}
+    cur_pos = [i for i, sid in enumerate(current.ids) if sid in prev_index]
+    prev_pos = [prev_index[current.ids[i]] for i in cur_pos]
+
+    cur_common = current.progress[cur_pos]
+    prev_common = previous.progress[prev_pos]
+    delta = cur_common - prev_common
+    changes = [
+        {"id": current.ids[cur_pos[k]], "from": float(prev_common[k]),
+         "to": float(cur_common[k]), "diff": float(delta[k])}
+        for k in np.flatnonzero(delta)
+    ]
+
+    cur_ids = set(current.ids)
+    added = [{"id": sid, "to": float(p)} for sid, p in zip(current.ids, current.progress) if sid not in prev_index]
+    removed = [{"id": sid, "from": float(p)} for sid, p in zip(previous.ids, previous.progress) if sid not in cur_ids]
+    return changes, added, removed
@@ -0,0 +1,158 @@
+import errno
+import glob
+import gzip
+import json
+import os
+import tempfile
+
+from skill_vectors import SkillVector
+
+# Counter keys read through get_counter; everything else in overAllCounters is dropped
+TRACKED_COUNTERS = [
+    ["Sessions", "Pmc"],
+    ["ExitStatus", "Survived", "Pmc"],
+    ["Kills"],
+    ["Deaths"],
+    ["LongestWinStreak", "Pmc"],
+]
+
+INFO_FIELDS = ("nickname", "experience", "side")
+
+
+def atomic_write(path, payload):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # A single-file bind mount (docker-compose user_config.json) can't be renamed over
+            if e.errno not in (errno.EBUSY, errno.EXDEV):
+                raise
+            with open(path, "wb") as f:
+                f.write(payload)
+            os.remove(tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def compact_profile(data):
+    # A null section (fresh or wiped profiles) reads the same as a missing one
+    info = data.get("info") or {}
+    skills = data.get("skills") or {}
+    eft = (data.get("pmcStats") or {}).get("eft") or {}
+
+    wanted = {tuple(key) for key in TRACKED_COUNTERS}
+    counters = [
+        {"Key": item["Key"], "Value": item["Value"]}
+        for item in (eft.get("overAllCounters") or {}).get("Items") or []
+        if tuple(item["Key"]) in wanted
+    ]
+
+    achievements = data.get("achievementCount")
+    if achievements is None:
+        achievements = len(data.get("achievements") or {})
+
+    vectors = data.get("vectors")
+    if vectors is None:
+        vectors = {
+            "common": SkillVector.from_entries(skills.get("Common") or []).to_dict(),
+            "mastery": SkillVector.from_entries(skills.get("Mastering") or []).to_dict(),
+        }
+
+    return {
+        "id": data.get("id"),
+        "updated": data.get("updated"),
+        "info": {field: info[field] for field in INFO_FIELDS if field in info},
+        "vectors": vectors,
+        "pmcStats": {
+            "eft": {
+                "totalInGameTime": eft.get("totalInGameTime", 0),
+                "overAllCounters": {"Items": counters},
+            }
+        },
+        "achievementCount": achievements,
+    }
+
+
+class SnapshotStore:
+    def __init__(self, directory="./snapshots", compress_level=6):
+        self.directory = directory
+        self.compress_level = compress_level
+
+    def snapshot_path(self, player_id):
+        return os.path.join(self.directory, f"{player_id}.snap.gz")
+
+    def validators_path(self, player_id):
+        return os.path.join(self.directory, f"{player_id}_validators.json")
+
+    def legacy_path(self, player_id):
+        return os.path.join(self.directory, f"{player_id}_snapshot.json")
+
+    def exists(self, player_id):
+        return os.path.exists(self.snapshot_path(player_id))
+
+    def load(self, player_id):
+        path = self.snapshot_path(player_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return json.loads(gzip.decompress(f.read()))
+
+    def encode(self, data):
+        payload = json.dumps(compact_profile(data), separators=(",", ":")).encode()
+        return gzip.compress(payload, self.compress_level)
+
+    def save(self, player_id, data, validators=None):
+        self.write(player_id, self.encode(data), validators)
+
+    def write(self, player_id, payload, validators=None):
+        # `payload` comes from encode(), possibly built in a worker process
+        atomic_write(self.snapshot_path(player_id), payload)
+        if validators:
+            self.save_validators(player_id, validators)
+
+    def delete(self, player_id):
+        for path in (self.snapshot_path(player_id), self.validators_path(player_id), self.legacy_path(player_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def load_validators(self, player_id):
+        # Validators are only usable while the snapshot they describe is still on disk
+        path = self.validators_path(player_id)
+        if not os.path.exists(path) or not self.exists(player_id):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def save_validators(self, player_id, validators):
+        atomic_write(self.validators_path(player_id), json.dumps(validators).encode())
+
+    def migrate_json_snapshots(self):
+        migrated = 0
+        if not os.path.isdir(self.directory):
+            return migrated
+        for path in glob.glob(os.path.join(self.directory, "*_snapshot.json")):
+            player_id = os.path.basename(path)[:-len("_snapshot.json")]
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"❌ Could not migrate snapshot {path}: {e}")
+                continue
+            self.save(player_id, data)
+            os.remove(path)
+            migrated += 1
+        return migrated
+
+
+if __name__ == "__main__":
+    store = SnapshotStore()
+    print(f"📦 Migrated {store.migrate_json_snapshots()} JSON snapshots to {store.directory}")
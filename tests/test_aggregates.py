@@ -0,0 +1,132 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregates import GuildRosters, QuantileSketch, RosterAggregate  # noqa: E402
+
+
+def nearest_rank(values, q):
+    # The rank QuantileSketch.quantile targets
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def random_values(rng):
+    return {"kd": rng.uniform(0, 8), "level": rng.randint(1, 79), "sr": rng.uniform(0, 100)}
+
+
+@pytest.mark.parametrize("q", [0.1, 0.5, 0.9, 0.99])
+def test_sketch_quantiles_within_accuracy(q):
+    rng = random.Random(8)
+    values = [rng.lognormvariate(0, 1.5) for _ in range(5000)]
+    sketch = QuantileSketch(accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    assert sketch.quantile(q) == pytest.approx(nearest_rank(values, q), rel=0.01)
+
+
+def test_sketch_remove_matches_fresh_sketch():
+    rng = random.Random(9)
+    values = [rng.choice([0, rng.uniform(0, 50)]) for _ in range(2000)]
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    for value in values[::2]:
+        sketch.remove(value)
+
+    fresh = QuantileSketch()
+    for value in values[1::2]:
+        fresh.add(value)
+    assert (sketch.count, sketch.zeros, sketch.buckets) == (fresh.count, fresh.zeros, fresh.buckets)
+
+
+def test_sketch_ignores_removing_unknown_values():
+    sketch = QuantileSketch()
+    sketch.add(5.0)
+    sketch.remove(500.0)
+    sketch.remove(0)
+    assert sketch.count == 1
+    assert sketch.quantile(0.5) == pytest.approx(5.0, rel=0.01)
+
+
+def test_empty_sketch_and_roster():
+    assert QuantileSketch().quantile(0.5) == 0
+    roster = RosterAggregate()
+    assert (roster.count, roster.mean("kd"), roster.median("kd")) == (0, 0, 0)
+
+
+def test_roster_update_replaces_previous_values():
+    roster = RosterAggregate()
+    roster.update("a", {"kd": 1.0, "level": 10, "sr": 50.0})
+    roster.update("b", {"kd": 3.0, "level": 20, "sr": 20.0})
+    roster.update("a", {"kd": 5.0, "level": 30, "sr": 40.0})
+    assert roster.count == 2
+    assert roster.mean("kd") == pytest.approx(4.0)
+    roster.remove("b")
+    roster.remove("missing")
+    assert roster.mean("level") == pytest.approx(30)
+    roster.remove("a")
+    assert roster.sums == {"kd": 0.0, "level": 0.0, "sr": 0.0}
+
+
+def test_guild_stats_match_recomputation_under_churn():
+    rng = random.Random(20)
+    rosters = GuildRosters()
+    user_config, values = {}, {}
+    for step in range(1500):
+        action = rng.random()
+        discord_id = f"u{rng.randrange(120)}"
+        if action < 0.5:
+            player_id = str(rng.randrange(80))
+            values[player_id] = random_values(rng)
+            rosters.update(player_id, values[player_id])
+        elif action < 0.8:
+            player_id = str(rng.randrange(80))
+            user_config[discord_id] = {"player_id": player_id, "guilds": rng.sample("abcd", rng.randint(0, 3))}
+            rosters.sync(user_config)
+        elif discord_id in user_config:
+            player_id = user_config.pop(discord_id)["player_id"]
+            rosters.sync(user_config)
+            # As in !untrack: a player nobody tracks any more leaves the roster entirely
+            if not any(u["player_id"] == player_id for u in user_config.values()):
+                rosters.remove(player_id)
+                values.pop(player_id, None)
+
+    for guild_id in "abcde":
+        members = {u["player_id"] for u in user_config.values() if guild_id in u["guilds"]} & set(values)
+        stats = rosters.stats(guild_id)
+        assert stats["count"] == len(members) == rosters.count(guild_id)
+        for metric in ("kd", "level", "sr"):
+            column = [values[player_id][metric] for player_id in members]
+            if not column:
+                assert stats["mean"][metric] == stats["median"][metric] == 0
+                continue
+            assert stats["mean"][metric] == pytest.approx(sum(column) / len(column))
+            assert stats["median"][metric] == pytest.approx(nearest_rank(column, 0.5), rel=0.01)
+
+
+def test_player_in_several_guilds_counts_in_each():
+    rosters = GuildRosters()
+    rosters.update("1", {"kd": 2.0, "level": 10, "sr": 30.0})
+    rosters.sync({"u1": {"player_id": "1", "guilds": ["a", "b"]}, "u2": {"player_id": "1", "guilds": ["b"]}})
+    assert rosters.count("a") == rosters.count("b") == 1
+    assert rosters.players(["a", "b"]) == {"1"}
+
+    rosters.update("1", {"kd": 4.0, "level": 10, "sr": 30.0})
+    assert rosters.stats("a")["mean"]["kd"] == rosters.stats("b")["mean"]["kd"] == pytest.approx(4.0)
+
+    rosters.sync({"u2": {"player_id": "1", "guilds": ["b"]}})
+    assert rosters.count("a") == 0
+    assert rosters.count("b") == 1
+
+
+def test_players_without_a_profile_yet_are_not_counted():
+    rosters = GuildRosters()
+    rosters.sync({"u1": {"player_id": "1", "guilds": ["a"]}})
+    assert rosters.count("a") == 0
+    rosters.update("1", {"kd": 1.0, "level": 1, "sr": 0.0})
+    assert rosters.count("a") == 1
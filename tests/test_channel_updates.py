@@ -0,0 +1,155 @@
+import asyncio
+import os
+import sys
+
+import discord
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import channel_updates  # noqa: E402
+from channel_updates import ChannelRenamer, TokenBucket  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeChannel:
+    def __init__(self, channel_id, name="old", error=None):
+        self.id = channel_id
+        self.name = name
+        self.error = error
+        self.edits = []
+
+    async def edit(self, name):
+        await asyncio.sleep(0)
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        self.edits.append(name)
+        self.name = name
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(channel_updates.time, "monotonic", clock)
+    return clock
+
+
+def run(renamer, coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            # Don't leave a retry timer behind on the closed loop
+            if renamer._retry is not None:
+                renamer._retry.cancel()
+    return asyncio.run(main())
+
+
+def test_bucket_capacity_and_refill(clock):
+    bucket = TokenBucket(capacity=2, period=600)
+    assert bucket.try_take()
+    assert bucket.try_take()
+    assert not bucket.try_take()
+    assert bucket.wait_time() == pytest.approx(300)
+
+    clock.now += 299
+    assert not bucket.try_take()
+    clock.now += 1
+    assert bucket.try_take()
+
+
+def test_bucket_drain_trusts_retry_after(clock):
+    bucket = TokenBucket(capacity=2, period=600)
+    bucket.drain(120)
+    assert bucket.wait_time() == pytest.approx(120)
+    clock.now += 120
+    assert bucket.try_take()
+
+
+def test_bucket_drain_never_adds_tokens(clock):
+    bucket = TokenBucket(capacity=2, period=600)
+    bucket.try_take()
+    bucket.try_take()
+    bucket.drain(0)
+    assert bucket.wait_time() == pytest.approx(300)
+
+
+def test_request_skips_unchanged_names(clock):
+    renamer = ChannelRenamer()
+    channel = FakeChannel(1, name="same")
+    renamer.request(channel, "same")
+    assert renamer.pending == {}
+    assert renamer.stats()["skipped"] == 1
+
+
+def test_requests_coalesce_to_latest_name(clock):
+    async def scenario(renamer):
+        channel = FakeChannel(1)
+        renamer.request(channel, "a")
+        renamer.request(channel, "b")
+        renamer.request(channel, "c")
+        await renamer.flush()
+        return channel
+
+    renamer = ChannelRenamer()
+    channel = run(renamer, scenario(renamer))
+    assert channel.edits == ["c"]
+    assert renamer.stats() == {"applied": 1, "skipped": 0, "deferred": 0, "pending": 0}
+
+
+def test_renames_past_capacity_are_deferred(clock):
+    async def scenario(renamer):
+        channel = FakeChannel(1)
+        for name in ("a", "b", "c"):
+            renamer.request(channel, name)
+            await renamer.flush()
+        deferred = dict(renamer.pending)
+        scheduled = renamer._retry is not None
+
+        clock.now += 300
+        await renamer.flush()
+        return channel, deferred, scheduled
+
+    renamer = ChannelRenamer(capacity=2, period=600)
+    channel, deferred, scheduled = run(renamer, scenario(renamer))
+    assert list(deferred) == [1] and deferred[1][1] == "c"
+    assert scheduled
+    assert channel.edits == ["a", "b", "c"]
+    assert renamer.stats()["deferred"] == 1
+
+
+def test_rate_limited_edit_is_requeued(clock):
+    async def scenario(renamer):
+        channel = FakeChannel(1, error=discord.RateLimited(90))
+        renamer.request(channel, "new")
+        await renamer.flush()
+        return channel
+
+    renamer = ChannelRenamer()
+    channel = run(renamer, scenario(renamer))
+    assert channel.edits == []
+    assert renamer.pending[1][1] == "new"
+    assert renamer._bucket(1).wait_time() == pytest.approx(90)
+    assert renamer.metrics.counter("channel_edits_rate_limited") == 1
+
+
+def test_overlapping_flushes_edit_each_channel_once(clock):
+    async def scenario(renamer):
+        channels = [FakeChannel(1), FakeChannel(2)]
+        for channel in channels:
+            renamer.request(channel, "new")
+        results = await asyncio.gather(renamer.flush(), renamer.flush(), return_exceptions=True)
+        return channels, results
+
+    renamer = ChannelRenamer()
+    channels, results = run(renamer, scenario(renamer))
+    assert results == [None, None]
+    assert [channel.edits for channel in channels] == [["new"], ["new"]]
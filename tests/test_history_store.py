@@ -0,0 +1,73 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import STAT_COLUMNS, HistoryStore  # noqa: E402
+
+NUMERIC = [column for column in STAT_COLUMNS if column != "nickname"]
+
+
+def stats(rng, nickname="p"):
+    return {"nickname": nickname, **{column: rng.randrange(10 ** 6) for column in NUMERIC}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+
+def test_flush_is_buffered_and_idempotent(store):
+    rng = random.Random(1)
+    store.record("1", 100, stats(rng), {"Endurance": 1.5})
+    assert store.latest("1") is None
+    assert store.flush() == 1
+    assert store.flush() == 0
+    # Recording the same (player, updated) again replaces the row
+    store.record("1", 100, stats(rng, nickname="renamed"))
+    store.flush()
+    assert [row["nickname"] for row in store.history("1")] == ["renamed"]
+    assert [row["progress"] for row in store.skill_history("1", "Endurance")] == [1.5]
+
+
+def test_baseline_falls_back_to_first_row_after_since(store):
+    rng = random.Random(2)
+    for updated in (200, 300):
+        store.record("1", updated, stats(rng))
+    store.flush()
+    assert store.baseline("1", 250)["updated"] == 200
+    assert store.baseline("1", 100)["updated"] == 200
+    assert store.baseline("2", 100) is None
+
+
+def test_deltas_match_per_player_delta(store):
+    rng = random.Random(5)
+    for player_id in range(30):
+        for updated in sorted(rng.sample(range(1, 1000), rng.randint(1, 6))):
+            store.record(str(player_id), updated, stats(rng))
+    store.flush()
+
+    for since in (0, 250, 500, 999, 5000):
+        deltas = store.deltas(since)
+        assert sorted(deltas) == sorted(str(player_id) for player_id in range(30))
+        for player_id, row in deltas.items():
+            single = store.delta(player_id, since)
+            assert (row["first"], row["last"]) == (single["from"], single["to"])
+            assert {column: row[column] for column in NUMERIC} == {column: single[column] for column in NUMERIC}
+
+
+def test_single_row_has_zero_delta(store):
+    store.record("1", 10, stats(random.Random(3)))
+    store.flush()
+    row = store.deltas(0)["1"]
+    assert row["first"] == row["last"] == 10
+    assert all(row[column] == 0 for column in NUMERIC)
+
+
+def test_deltas_empty_store(store):
+    assert store.deltas(0) == {}
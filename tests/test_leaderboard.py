@@ -0,0 +1,106 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import StatsTable, normalize_metric  # noqa: E402
+
+
+def filled(count, capacity=4):
+    table = StatsTable(capacity=capacity)
+    for i in range(count):
+        table.upsert(str(i), f"p{i}", {"kd": float(i), "level": i + 1})
+    return table
+
+
+def assert_consistent(table, expected):
+    # Every row maps back to its player and still holds that player's values
+    assert len(table) == len(expected)
+    assert sorted(table.rows) == sorted(expected)
+    for player_id, row in table.rows.items():
+        assert table.player_ids[row] == player_id
+        assert table.nicknames[row] == f"p{player_id}"
+        assert table.columns["kd"][row] == expected[player_id]
+
+
+def test_upsert_grows_past_capacity():
+    table = filled(10, capacity=4)
+    assert_consistent(table, {str(i): float(i) for i in range(10)})
+
+
+def test_swap_remove_keeps_rows_consistent():
+    table = filled(6)
+    expected = {str(i): float(i) for i in range(6)}
+    for player_id in ("2", "5", "0", "missing"):
+        table.remove(player_id)
+        expected.pop(player_id, None)
+        assert_consistent(table, expected)
+
+
+def test_random_upserts_and_removes():
+    rng = random.Random(14)
+    table = StatsTable(capacity=2)
+    expected = {}
+    for _ in range(2000):
+        player_id = str(rng.randrange(50))
+        if rng.random() < 0.4:
+            table.remove(player_id)
+            expected.pop(player_id, None)
+        else:
+            value = float(rng.randrange(1000))
+            table.upsert(player_id, f"p{player_id}", {"kd": value})
+            expected[player_id] = value
+    assert_consistent(table, expected)
+
+
+def test_reused_row_does_not_inherit_removed_values():
+    table = filled(2)
+    table.remove("1")
+    table.upsert("new", "new", {"kd": 5.0})
+    assert table.columns["level"][table.rows["new"]] == 0
+
+
+def test_ranking_orders_and_limits():
+    table = filled(5)
+    assert [player_id for player_id, _, _ in table.ranking("kd", limit=3)] == ["4", "3", "2"]
+    assert table.ranking("level", limit=1) == [("4", "p4", 5.0)]
+
+
+def test_ranking_ties_keep_row_order():
+    table = StatsTable()
+    for player_id in "abc":
+        table.upsert(player_id, player_id, {"kd": 1.0})
+    assert [player_id for player_id, _, _ in table.ranking("kd")] == ["a", "b", "c"]
+
+
+def test_ranking_cache_invalidated_by_changes():
+    table = filled(3)
+    first = table.ranking("kd")
+    assert table.ranking("kd") is first
+
+    table.upsert("1", "p1", {"kd": 10.0})
+    assert table.ranking("kd")[0] == ("1", "p1", 10.0)
+
+    table.remove("1")
+    assert "1" not in {player_id for player_id, _, _ in table.ranking("kd")}
+
+    table.set_column("kd", {"0": 7.0})
+    assert table.ranking("kd")[0] == ("0", "p0", 7.0)
+
+
+def test_ranking_limited_to_players():
+    table = filled(6)
+    ranking = table.ranking("kd", key="odd", players={"1", "3", "5", "unknown"})
+    assert [player_id for player_id, _, _ in ranking] == ["5", "3", "1"]
+    assert table.ranking("kd", key="none", players=set()) == []
+    # Different keys are cached separately
+    assert table.ranking("kd", key="even", players={"0", "2"})[0][0] == "2"
+    assert table.ranking("kd", key="odd", players={"1", "3", "5"}) is ranking
+
+
+def test_normalize_metric_aliases():
+    assert normalize_metric("K/D") == "kd"
+    assert normalize_metric(" weekly ") == "xp_week"
+    assert normalize_metric(None) == "kd"
+    assert normalize_metric("bogus") is None
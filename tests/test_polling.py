@@ -0,0 +1,95 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from polling import PollScheduler  # noqa: E402
+
+INTERVAL = 3600
+SLOTS = 12
+TICK = INTERVAL / SLOTS
+START = 1_000_000 * TICK
+
+
+def scheduler(tmp_path, players=200):
+    poll = PollScheduler(interval=INTERVAL, slots=SLOTS, store_path=str(tmp_path / "poll_schedule.json"))
+    for player_id in range(players):
+        poll.add(str(player_id))
+    return poll
+
+
+def due_at(poll, tick, now):
+    # The schedule written out: due whenever the tick is in the player's phase
+    return {
+        player_id for player_id, state in poll.players.items()
+        if (tick - state["slot"]) % poll.period_for(state, now) == 0
+    }
+
+
+def test_first_call_takes_only_the_current_tick(tmp_path):
+    poll = scheduler(tmp_path)
+    due = poll.take_due(START)
+    assert set(due) == due_at(poll, poll.current_tick(START), START)
+    assert due
+    assert poll.take_due(START) == []
+
+
+def test_skipped_ticks_are_caught_up(tmp_path):
+    poll = scheduler(tmp_path)
+    poll.take_due(START)
+    later = START + 3 * TICK
+    tick = poll.current_tick(later)
+    expected = set().union(*(due_at(poll, t, later) for t in (tick - 2, tick - 1, tick)))
+    assert set(poll.take_due(later)) == expected
+
+
+def test_catch_up_is_capped_at_one_interval(tmp_path):
+    poll = scheduler(tmp_path)
+    poll.take_due(START)
+    # After a long outage everyone on the normal period is due, but only once
+    due = poll.take_due(START + 10 * INTERVAL)
+    assert sorted(due) == sorted(poll.players)
+
+
+def test_periods_follow_activity(tmp_path):
+    poll = scheduler(tmp_path, players=3)
+    poll.mark("0", changed=True, now=START - 60)
+    poll.mark("1", changed=True, now=START - poll.dormant_after - 60)
+    periods = {player_id: poll.period_for(state, START) for player_id, state in poll.players.items()}
+    assert periods == {"0": SLOTS // 2, "1": SLOTS * 4, "2": SLOTS}
+
+
+def test_dormant_players_wait_their_longer_period(tmp_path):
+    poll = scheduler(tmp_path, players=50)
+    for player_id in poll.players:
+        poll.mark(player_id, changed=True, now=START - poll.dormant_after - 60)
+    poll.take_due(START)
+    seen = set()
+    for step in range(1, SLOTS * 4 + 1):
+        due = poll.take_due(START + step * TICK)
+        assert not seen & set(due)
+        seen.update(due)
+    assert seen == set(poll.players)
+
+
+def test_last_tick_survives_a_restart(tmp_path):
+    poll = scheduler(tmp_path)
+    poll.take_due(START)
+    poll.save()
+
+    restored = PollScheduler(interval=INTERVAL, slots=SLOTS, store_path=poll.store_path)
+    restored.load()
+    assert restored.last_tick == poll.last_tick
+    assert restored.players == poll.players
+    assert restored.take_due(START) == []
+
+
+def test_changed_slot_count_resets_the_schedule(tmp_path):
+    poll = scheduler(tmp_path)
+    poll.take_due(START)
+    poll.save()
+
+    resized = PollScheduler(interval=INTERVAL, slots=SLOTS * 2, store_path=poll.store_path)
+    resized.load()
+    assert resized.players == {}
+    assert resized.last_tick is None
@@ -0,0 +1,138 @@
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_profile  # noqa: E402
+from profile_stream import ProfileExtractor, extract_profile  # noqa: E402
+from snapshot_store import compact_profile  # noqa: E402
+
+
+def small_profile(seed, counters=60):
+    return make_profile(seed, counters=counters, mastering=8, achievements=5)
+
+
+def feed(body, sizes):
+    # `sizes` yields chunk lengths; the extractor only ever sees bytes, as off the socket
+    extractor = ProfileExtractor()
+    pos = 0
+    while pos < len(body):
+        size = next(sizes)
+        extractor.feed(body[pos:pos + size])
+        pos += size
+    return extractor.close()
+
+
+def random_sizes(rng, largest):
+    while True:
+        yield rng.randint(1, largest)
+
+
+def ones():
+    while True:
+        yield 1
+
+
+def expected(body):
+    return compact_profile(json.loads(body))
+
+
+def dumps(profile, rng=None):
+    # Compact, default and pretty-printed bodies all go through different fast paths
+    style = rng.randrange(3) if rng else 0
+    if style == 0:
+        return json.dumps(profile, separators=(",", ":")).encode()
+    if style == 1:
+        return json.dumps(profile).encode()
+    return json.dumps(profile, indent=rng.choice([1, 2, "\t"])).encode()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_chunk_boundaries(seed):
+    rng = random.Random(seed)
+    body = dumps(small_profile(seed, counters=rng.randint(5, 400)), rng)
+    assert feed(body, random_sizes(rng, rng.choice([3, 64, 4096]))) == expected(body)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_one_byte_feeds(seed):
+    profile = small_profile(seed)
+    profile["info"]["nickname"] = "Ёжик \"quoted\" \\ 🦔"
+    body = dumps(profile, random.Random(seed))
+    assert feed(body, ones()) == expected(body)
+
+
+def test_numbers_split_across_chunks():
+    profile = small_profile(1)
+    profile["updated"] = 1712345678901
+    profile["pmcStats"]["eft"]["totalInGameTime"] = 98765.4321e3
+    body = dumps(profile)
+    for number in (b"1712345678901", b"98765432.1"):
+        start = body.index(number)
+        for cut in range(start, start + len(number) + 1):
+            extractor = ProfileExtractor()
+            extractor.feed(body[:cut])
+            extractor.feed(body[cut:])
+            assert extractor.close() == expected(body)
+
+
+def test_escaped_counter_keys():
+    profile = small_profile(2, counters=30)
+    items = profile["pmcStats"]["eft"]["overAllCounters"]["Items"]
+    items += [
+        {"Key": ["Kills\"Pmc"], "Value": 1},
+        {"Key": ["Sessions", "P\\mc"], "Value": 2},
+        {"Key": ["Deaths", "a]b"], "Value": 3},
+        {"Key": ["Money", "], \"Value\": 4}, {\"Key\": [\"Kills\""], "Value": 5},
+    ]
+    body = dumps(profile)
+    # A tracked key spelled with escapes still has to be kept
+    body = body.replace(b'"LongestWinStreak"', b'"Longest\\u0057inStreak"')
+    assert feed(body, random_sizes(random.Random(2), 17)) == expected(body)
+    assert extract_profile(body) == expected(body)
+
+
+def test_reordered_counter_items():
+    profile = small_profile(3, counters=40)
+    items = profile["pmcStats"]["eft"]["overAllCounters"]["Items"]
+    profile["pmcStats"]["eft"]["overAllCounters"]["Items"] = [
+        {"Value": item["Value"], "Key": item["Key"]} if i % 2 else dict(item, Extra=[1, {"x": "]"}])
+        for i, item in enumerate(items)
+    ]
+    body = dumps(profile)
+    result = feed(body, random_sizes(random.Random(3), 50))
+    assert result == expected(body)
+    assert len(result["pmcStats"]["eft"]["overAllCounters"]["Items"]) == 5
+
+
+@pytest.mark.parametrize("path", [
+    ("info",), ("skills",), ("skills", "Common"), ("skills", "Mastering"), ("achievements",),
+    ("pmcStats",), ("pmcStats", "eft"), ("pmcStats", "eft", "overAllCounters"),
+    ("pmcStats", "eft", "overAllCounters", "Items"),
+])
+def test_null_sections(path):
+    profile = small_profile(4)
+    parent = profile
+    for key in path[:-1]:
+        parent = parent[key]
+    parent[path[-1]] = None
+    body = dumps(profile)
+    assert feed(body, random_sizes(random.Random(4), 9)) == expected(body)
+
+
+def test_missing_sections():
+    body = json.dumps({"id": "1", "updated": 5}).encode()
+    assert feed(body, ones()) == expected(body)
+
+
+def test_truncated_input():
+    body = dumps(small_profile(5, counters=8))
+    for cut in range(len(body)):
+        extractor = ProfileExtractor()
+        extractor.feed(body[:cut])
+        with pytest.raises(ValueError):
+            extractor.close()
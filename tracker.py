@@ -2,461 +2,532 @@ import discord
 from discord import Embed
 from discord.ext import commands
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-import requests, json, os
+import os
 from dotenv import load_dotenv
 import traceback
 import math
+import time
+import signal
+import asyncio
+import json
+from fetcher import ProfileFetcher, ProfileCache
+from snapshot_store import SnapshotStore
+from history_store import HistoryStore
+from player_profile import ParsedProfile, diff_stats
+from embeds import format_embed
+from profile_pipeline import ProfilePipeline
+from profile_stream import extract_profile
+from aggregates import GuildRosters
+from channel_updates import ChannelRenamer
+from delivery import DeliveryQueue, percentiles
+from polling import PollScheduler
+from player_index import PlayerIndex, INDEX_URL
+from leaderboard import StatsTable, LEADERBOARD_METRICS, normalize_metric
+from persistence import JsonDocument
+from metrics import Metrics, StackSampler, start_metrics_server
 
 ENV_FILE = "./.env"
 
 load_dotenv(dotenv_path=ENV_FILE, override=True)  # Exact path
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "10"))
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "20"))
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "900"))
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "5000"))
+HISTORY_DB = os.getenv("HISTORY_DB", "./snapshots/history.db")
+DM_WORKERS = int(os.getenv("DM_WORKERS", "8"))
+# "burst" polls everyone every interval, "sharded" (opt-in) polls a slice of the roster every tick
+POLL_MODE = os.getenv("POLL_MODE", "burst")
+POLL_SLOTS = int(os.getenv("POLL_SLOTS", "36"))
+POLL_INTERVAL_HOURS = 3
+PLAYER_INDEX_URL = os.getenv("PLAYER_INDEX_URL", INDEX_URL)
+PLAYER_INDEX_REFRESH_HOURS = float(os.getenv("PLAYER_INDEX_REFRESH_HOURS", "24"))
+# Worker processes for parsing, diffing and embed building; 0 keeps that work on the event loop
+PROFILE_WORKERS = int(os.getenv("PROFILE_WORKERS", "0"))
+# "stream" pulls only the fields the bot reads out of each response, "json" loads the whole document
+PROFILE_PARSER = os.getenv("PROFILE_PARSER", "stream")
+# Prometheus-style text endpoint, off unless a port is set; binds to localhost by default
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# The one server the bot served before per-guild config; legacy channels and tracks are moved to it
+DEFAULT_GUILD_ID = os.getenv("DEFAULT_GUILD_ID", "972229559233695814")
+SWEEP_PROFILE_FILE = "./snapshots/sweep_profile.folded"
 
 CONFIG_FILE = "./user_config.json"
 
-def load_user_config():
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, "r") as f:
-            return json.load(f)
-    return {}
+# Mutations only mark the document dirty; writes are batched and done off the event loop
+user_config_store = JsonDocument(CONFIG_FILE)
+user_config = user_config_store.data
 
 def save_user_config():
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(user_config, f, indent=2)
-
-user_config = load_user_config()
+    user_config_store.mark_dirty()
 
 intents = discord.Intents.default()
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Long rate-limit waits raise discord.RateLimited instead of silently stalling the caller
+bot = commands.Bot(command_prefix="!", intents=intents, max_ratelimit_timeout=30.0)
 scheduler = AsyncIOScheduler()
+metrics = Metrics()
+snapshot_store = SnapshotStore("./snapshots")
+history_store = HistoryStore(HISTORY_DB)
+guild_rosters = GuildRosters()
+channel_renamer = ChannelRenamer(metrics=metrics)
+delivery = DeliveryQueue(bot, workers=DM_WORKERS, metrics=metrics)
+poll_scheduler = PollScheduler(interval=POLL_INTERVAL_HOURS * 3600, slots=POLL_SLOTS)
+leaderboard_table = StatsTable()
+player_index = PlayerIndex(PLAYER_INDEX_URL, max_age=PLAYER_INDEX_REFRESH_HOURS * 3600)
+decode_profile = extract_profile if PROFILE_PARSER == "stream" else json.loads
+# With workers the response body is decoded in the pool, not on the loop
+fetcher = ProfileFetcher(concurrency=FETCH_CONCURRENCY, timeout=FETCH_TIMEOUT, metrics=metrics,
+                         decode=None if PROFILE_WORKERS else PROFILE_PARSER)
+pipeline = ProfilePipeline(snapshot_store.directory, workers=PROFILE_WORKERS, decode=decode_profile)
+profile_cache = ProfileCache(lambda player_id: fetch_profile(player_id), ttl=PROFILE_CACHE_TTL, max_size=PROFILE_CACHE_SIZE)
+metrics.add_gauges(lambda: {
+    "tracked_players": len(leaderboard_table),
+    "tracked_users": len(user_config),
+    "tracked_guilds": len(guild_rosters.members),
+    "pending_dms": len(delivery.pending),
+    "pending_channel_renames": len(channel_renamer.pending),
+    **{f"profile_cache_{k}": v for k, v in profile_cache.stats().items()},
+    **{f"upstream_{k}": v for k, v in fetcher.stats().items() if k != "bytes_downloaded"},
+})
+# Armed by `!botstats profile`, consumed by the next sweep
+profile_next_sweep = False
+last_sweep_profile = None
+
+
+async def fetch_profile(player_id):
+    with metrics.span("fetch"):
+        return await fetcher.fetch(player_id, snapshot_store.load_validators(player_id))
+
+def load_snapshot(player_id):
+    with metrics.span("snapshot_load"):
+        return snapshot_store.load(player_id)
+
+def save_snapshot(player_id, data, validators=None):
+    with metrics.span("snapshot_save"):
+        snapshot_store.save(player_id, data, validators)
+
+async def write_snapshot(player_id, payload, validators=None):
+    # fsync-heavy, so it runs on a thread instead of stalling the loop once per player
+    with metrics.span("snapshot_save"):
+        await asyncio.to_thread(snapshot_store.write, player_id, payload, validators)
+
+def resolve_profile(fetched):
+    # A 304 means the saved snapshot is still current
+    if fetched.not_modified:
+        data = load_snapshot(fetched.player_id)
+        if data is None:
+            raise RuntimeError(f"Snapshot for {fetched.player_id} vanished after a 304")
+        return data
+    if fetched.data is None:
+        return decode_profile(fetched.body)
+    return fetched.data
+
+def parse_profile(fetched):
+    # Memoized on the cached fetch so every consumer shares one counter index
+    if fetched.parsed is None:
+        with metrics.span("parse"):
+            fetched.parsed = ParsedProfile(resolve_profile(fetched))
+            fetched.body = None
+    return fetched.parsed
+
+async def fetch_all(player_ids):
+    # Whole batch, cache hits included; each upstream fetch is also timed on its own as "fetch"
+    with metrics.span("fetch_all"):
+        return await profile_cache.get_many(player_ids)
+
+def log_cache_stats():
+    stats = profile_cache.stats()
+    print(f"🗃 Profile cache: {stats['hits']} hits, {stats['misses']} misses, {stats['coalesced']} coalesced, {stats['size']} cached")
+
+def record_history(player_id, profile):
+    history_store.record(player_id, profile.updated, profile.stats(), profile.skill_progress)
+
+def update_roster(player_id, profile):
+    values = {
+        "kd": profile.kd_ratio,
+        "level": profile.level,
+        "sr": profile.sr_ratio,
+        "hours": profile.hours_played,
+    }
+    guild_rosters.update(player_id, values)
+    leaderboard_table.upsert(player_id, profile.nickname, values)
+
+def remove_from_roster(player_id):
+    guild_rosters.remove(player_id)
+    leaderboard_table.remove(player_id)
+
+weekly_xp_state = None
+
+def refresh_weekly_xp():
+    # Recomputed at most hourly, or sooner when the table itself changed
+    global weekly_xp_state
+    state = (leaderboard_table.version, int(time.time() // 3600))
+    if state == weekly_xp_state:
+        return
+    since = (time.time() - 7 * 24 * 3600) * 1000  # profile "updated" values are in ms
+    deltas = history_store.deltas(since)
+    leaderboard_table.set_column("xp_week", {player_id: row["experience"] for player_id, row in deltas.items()})
+    weekly_xp_state = (leaderboard_table.version, state[1])
+
+def seed_roster():
+    # Rebuilt from the snapshots on disk at startup, then kept current as profiles change
+    for player_id in {user_data["player_id"] for user_data in user_config.values()}:
+        data = snapshot_store.load(player_id)
+        if data is not None:
+            update_roster(player_id, ParsedProfile(data))
+    guild_rosters.sync(user_config)
+    print(f"📊 Roster aggregate seeded with {len(leaderboard_table)} profiles across {len(guild_rosters.members)} guilds.")
+
+GUILD_CONFIG_FILE = "./snapshots/guild_config.json"
+LEGACY_STATS_CHANNELS_FILE = "./stats_channels.json"
+LEGACY_BOT_ROLE_ID = 1388899865861292127
+STATS_CATEGORY_NAME = "📊 PVE Tarkov Stats"
+
+# guild_id -> {"channels": {key: channel_id}, "bot_role_id": optional role given access to the channels}
+guild_config_store = JsonDocument(GUILD_CONFIG_FILE)
+guild_config = guild_config_store.data
+
+def save_guild_config():
+    guild_config_store.mark_dirty()
+
+def migrate_guild_config():
+    # Before per-guild config there was one flat stats_channels.json and every track counted toward one server
+    legacy_tracks = [user_data for user_data in user_config.values() if "guilds" not in user_data]
+    for user_data in legacy_tracks:
+        user_data["guilds"] = [DEFAULT_GUILD_ID]
+    if legacy_tracks:
+        save_user_config()
 
-XP_LEVELS = [
-    0, 1000, 4017, 8432, 14256, 21477, 30023, 39936, 51204, 63723,
-    77563, 92713, 111881, 134674, 161139, 191417, 225194, 262366, 302484, 345751,
-    391649, 440444, 492366, 547896, 609066, 679255, 755444, 837672, 925976, 1020396,
-    1120969, 1227735, 1344260, 1470605, 1606833, 1759965, 1923579, 2097740, 2282513, 2477961,
-    2684149, 2901143, 3132824, 3379281, 3640603, 3929436, 4233995, 4554372, 4890662, 5242956,
-    5611348, 5995931, 6402287, 6830542, 7280825, 7753260, 8247975, 8765097, 9304752, 9876880,
-    10512365, 11193911, 11929835, 12727177, 13615989, 14626588, 15864243, 17555001, 19926895,
-    22926895, 26526895, 30726895, 35526895, 40926895, 46926895, 53526895, 60726895, 69126895,
-    81126895
-]
-
-def get_snapshot_file(player_id):
-    os.makedirs("./snapshots", exist_ok=True)
-    path = f"./snapshots/{player_id}_snapshot.json"
-
-    return path
-
-
-def fetch_data(player_id):
-    url = f"https://players.tarkov.dev/pve/{player_id}.json"
-    res = requests.get(url)
-    res.raise_for_status()
-    return res.json()
-
-def calculate_level_from_experience(exp):
-    for i in range(len(XP_LEVELS) - 1, -1, -1):
-        if exp >= XP_LEVELS[i]:
-            return i + 1
-    return 1
-
-def get_counter(data, key_path):
-    for item in data.get("pmcStats", {}).get("eft", {}).get("overAllCounters", {}).get("Items", []):
-        if item["Key"] == key_path:
-            return item["Value"]
-    return 0
-
-def diff_stats(current, previous):
-    result = {"experience": None, "skills": [], "mastery": []}
-    if current["info"]["experience"] != previous["info"]["experience"]:
-        result["experience"] = {
-            "from": previous["info"]["experience"],
-            "to": current["info"]["experience"],
-            "diff": current["info"]["experience"] - previous["info"]["experience"]
-        }
-
-    prev_skills = {s["Id"]: s["Progress"] for s in previous["skills"]["Common"]}
-    for skill in current["skills"]["Common"]:
-        sid = skill["Id"]
-        if sid in prev_skills and skill["Progress"] != prev_skills[sid]:
-            result["skills"].append({
-                "id": sid,
-                "from": prev_skills[sid],
-                "to": skill["Progress"],
-                "diff": skill["Progress"] - prev_skills[sid]
-            })
-
-    prev_mastery = {m["Id"]: m["Progress"] for m in previous["skills"]["Mastering"]}
-    for mastery in current["skills"]["Mastering"]:
-        mid = mastery["Id"]
-        if mid in prev_mastery and mastery["Progress"] != prev_mastery[mid]:
-            result["mastery"].append({
-                "id": mid,
-                "from": prev_mastery[mid],
-                "to": mastery["Progress"],
-                "diff": mastery["Progress"] - prev_mastery[mid]
-            })
-
-    return result
-
-STATS_CHANNELS_FILE = "./stats_channels.json"
-
-def load_stats_channel_ids():
-    if os.path.exists(STATS_CHANNELS_FILE):
-        with open(STATS_CHANNELS_FILE, "r") as f:
-            return json.load(f)
-    return {}
-
-def save_stats_channel_ids(data):
-    with open(STATS_CHANNELS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
-
-stats_channel_ids = load_stats_channel_ids()
-
-async def update_stats_channels(guild):
-    category_name = "📊 PVE Tarkov Stats"
-    category = discord.utils.get(guild.categories, name=category_name)
+    if DEFAULT_GUILD_ID in guild_config or not os.path.exists(LEGACY_STATS_CHANNELS_FILE):
+        return len(legacy_tracks)
+    with open(LEGACY_STATS_CHANNELS_FILE, "r") as f:
+        channels = json.load(f)
+    guild_config[DEFAULT_GUILD_ID] = {"channels": channels, "bot_role_id": LEGACY_BOT_ROLE_ID}
+    save_guild_config()
+    return len(legacy_tracks)
+
+async def update_stats_channels(guild, stats):
+    config = guild_config.setdefault(str(guild.id), {})
+    channels = config.setdefault("channels", {})
+    category = discord.utils.get(guild.categories, name=STATS_CATEGORY_NAME)
+
+    # A configured role if the server set one up, otherwise the bot's own member
+    bot_target = guild.get_role(config["bot_role_id"]) if config.get("bot_role_id") else guild.me
+    if bot_target is None:
+        print(f"❌ Bot role with ID {config['bot_role_id']} not found in guild {guild.name}")
+        return
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(connect=False, view_channel=True),
+        bot_target: discord.PermissionOverwrite(view_channel=True, manage_channels=True)
+    }
 
     if not category:
+        category = await guild.create_category(STATS_CATEGORY_NAME, overwrites=overwrites)
+        print(f"📁 Created category '{STATS_CATEGORY_NAME}' in {guild.name}")
 
-        BOT_ROLE_ID = 1388899865861292127
-            
-        bot_role = guild.get_role(BOT_ROLE_ID)
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(connect=False, view_channel=True),
-            bot_role: discord.PermissionOverwrite(view_channel=True, manage_channels=True)
-        }
-        category = await guild.create_category(category_name, overwrites=overwrites)
-        print(f"📁 Created category '{category_name}'")
-
-    total_kd = total_lvl = total_sr = count = 0
-
-    for discord_id, user_data in user_config.items():
-        player_id = user_data["player_id"]
-        try:
-            data = fetch_data(player_id)
-            exp = data["info"].get("experience", 0)
-            level = calculate_level_from_experience(exp)
-            pmc_raids = get_counter(data, ["Sessions", "Pmc"])
-            survived = get_counter(data, ["ExitStatus", "Survived", "Pmc"])
-            kills = get_counter(data, ["Kills"])
-            deaths = get_counter(data, ["Deaths"])
-
-            kd_ratio = kills / deaths if deaths else 0
-            sr_ratio = (survived / pmc_raids) * 100 if pmc_raids else 0
-
-            total_kd += kd_ratio
-            total_lvl += level
-            total_sr += sr_ratio
-            count += 1
-        except Exception as e:
-            print(f"❌ Failed to process player {player_id}: {e}")
-            continue
-        
-    if count == 0:
-        avg_kd = avg_lvl = avg_sr = 0
-    else:
-        avg_kd = total_kd / count
-        avg_lvl = total_lvl / count
-        avg_sr = total_sr / count
-
-
+    mean = stats["mean"]
     channel_names = {
-        "kd": f"🔫 Avg K/D: {avg_kd:.2f}",
-        "lvl": f"🎖 Avg Level: {avg_lvl:.1f}",
-        "sr": f"🏃 Avg S/R: {avg_sr:.1f}%",
-        "tracked": f"📦 PVE Profiles: {count}"
+        "kd": f"🔫 Avg K/D: {mean['kd']:.2f}",
+        "lvl": f"🎖 Avg Level: {mean['level']:.1f}",
+        "sr": f"🏃 Avg S/R: {mean['sr']:.1f}%",
+        "tracked": f"📦 PVE Profiles: {stats['count']}"
     }
 
     for key, name in channel_names.items():
-        channel_id = stats_channel_ids.get(key)
+        channel_id = channels.get(key)
         channel = guild.get_channel(channel_id) if channel_id else None
-    
-        if not channel:
-            # Delete miscategorized or missing channels
-            if channel:
-                await channel.delete()
-
-            if bot_role is None:
-                print(f"❌ Bot role with ID {BOT_ROLE_ID} not found in guild {guild.name}")
-                return
-
-            overwrites = {
-                guild.default_role: discord.PermissionOverwrite(connect=False, view_channel=True),
-                bot_role: discord.PermissionOverwrite(view_channel=True, manage_channels=True)
-            }
 
+        if not channel:
             new_channel = await guild.create_voice_channel(name=name, category=category, overwrites=overwrites)
-            stats_channel_ids[key] = new_channel.id
-
-            save_stats_channel_ids(stats_channel_ids)
+            channels[key] = new_channel.id
+            save_guild_config()
         else:
+            channel_renamer.request(channel, name)
+
+async def refresh_stat_channels(guilds):
+    before = channel_renamer.stats()
+    try:
+        for guild in guilds:
+            # Running sums and sketches, kept current as profiles change: nothing is rescanned here
+            guild_stats = guild_rosters.stats(guild.id)
+            median = guild_stats["median"]
+            print(
+                f"📊 {guild.name}: {guild_stats['count']} profiles, medians K/D {median['kd']:.2f}, "
+                f"level {median['level']:.0f}, S/R {median['sr']:.1f}%"
+            )
+            # One server's failure (permissions, channel limit, a 5xx) mustn't hold up the others
             try:
-                await channel.edit(name=name)
+                await update_stats_channels(guild, guild_stats)
             except discord.Forbidden:
-                print(f"❌ Missing permission to edit channel {channel.name} ({channel.id})")
-            except Exception as e:
-                print(f"❌ Unexpected error editing channel {channel.id}: {e}")
-
-def format_embed(data, diff, player_id, previous=None):
-    def annotate_change(current, previous_val):
-        if previous_val is None:
-            return f"{current:,.2f}" if isinstance(current, float) else f"{current:,}"
-
-        delta = current - previous_val
-        if delta == 0:
-            return f"{current:,.2f}" if isinstance(current, float) else f"{current:,}"
-
-        sign = "+" if delta > 0 else "-"
-        if isinstance(current, float):
-            return f"{current:,.2f} ({sign}{abs(delta):,.2f})"
-        else:
-            return f"{current:,} ({sign}{abs(delta):,})"
-
-    name = data["info"].get("nickname", "Unknown")
-    exp = data["info"].get("experience", 0)
-    level = calculate_level_from_experience(exp)
-    side = data["info"].get("side", "Unknown")
-    time_played_secs = data.get("pmcStats", {}).get("eft", {}).get("totalInGameTime", 0)
-    time_played_hrs = time_played_secs / 3600
-
-    pmc_raids = get_counter(data, ["Sessions", "Pmc"])
-    survived = get_counter(data, ["ExitStatus", "Survived", "Pmc"])
-    kills = get_counter(data, ["Kills"])
-    deaths = get_counter(data, ["Deaths"])
-    kd_ratio = kills / deaths if deaths else 0
-    sr_ratio = (survived / pmc_raids) * 100 if pmc_raids else 0
-    achievements = len(data.get("achievements", {}))
-    win_streak = get_counter(data, ["LongestWinStreak", "Pmc"])
-
-    # For diffs in overall embed
-    prev_exp = previous["info"]["experience"] if previous else None
-    prev_kills = get_counter(previous, ["Kills"]) if previous else None
-    prev_deaths = get_counter(previous, ["Deaths"]) if previous else None
-    prev_survived = get_counter(previous, ["ExitStatus", "Survived", "Pmc"]) if previous else None
-    prev_raids = get_counter(previous, ["Sessions", "Pmc"]) if previous else None
-    prev_played = previous.get("pmcStats", {}).get("eft", {}).get("totalInGameTime", 0) if previous else None
-    prev_played_hrs = prev_played / 3600 if prev_played else None
-    prev_streak = get_counter(previous, ["LongestWinStreak", "Pmc"]) if previous else None
-    prev_achievements = len(previous.get("achievements", {})) if previous else None
-    prev_level = calculate_level_from_experience(prev_exp) if prev_exp is not None else None
-    prev_kd = (prev_kills / prev_deaths) if prev_kills is not None and prev_deaths and prev_deaths > 0 else None
-    prev_sr = (prev_survived / prev_raids) * 100 if prev_survived is not None and prev_raids else None
-
-    updated_embed = Embed(
-        title="📊 Updated Tarkov Stats",
-        description=f"\n[{name}](https://tarkov.dev/players/pve/{player_id}) \nSide: {side}",
-        color=0x00ff99
+                print(f"❌ Missing permissions to manage stat channels in {guild.name}")
+            except discord.HTTPException as e:
+                print(f"❌ Failed to update stat channels in {guild.name}: {e}")
+    finally:
+        await channel_renamer.flush()
+    after = channel_renamer.stats()
+    print(
+        f"✏️ Stat channels: {after['applied'] - before['applied']} renamed, "
+        f"{after['skipped'] - before['skipped']} unchanged, "
+        f"{after['deferred'] - before['deferred']} deferred by rate limit"
     )
-    updated_embed.set_thumbnail(url="https://cdn-icons-png.flaticon.com/512/5354/5354526.png")
-
-    updated_embed.add_field(name="PMC Level", value=f"```{annotate_change(level, prev_level)}```", inline=False)
 
-    if diff["experience"]:
-        d = diff["experience"]
-        updated_embed.add_field(
-            name="Experience",
-            value=f"```{d['from']:,} → {d['to']:,} (+{d['diff']:,})```",
-            inline=False
-        )
-    else:
-        updated_embed.add_field(
-            name="Experience",
-            value=f"```{exp:,} (no change)```",
-            inline=False
-        )
+async def check_player(player_id, discord_ids, fetched):
+    # One analysis per player; every user tracking them gets the same notification.
+    # Returns the update to apply, or None when there's nothing to write
+    try:
+        if isinstance(fetched, Exception):
+            raise fetched
+
+        if fetched.not_modified:
+            print(f"📭 No new update for {player_id} (304).")
+            return None
+
+        with metrics.span("analyze"):
+            update = await pipeline.analyze(fetched)
+        for stage, seconds in update.timings.items():
+            metrics.observe(stage, seconds)
+        # Later cache hits (e.g. !track) reuse the compact profile instead of the raw body
+        fetched.parsed, fetched.body = update.profile, None
+
+        if update.status == "unchanged":
+            await asyncio.to_thread(snapshot_store.save_validators, player_id, fetched.validators)
+            print(f"📭 No new update for {player_id}.")
+            return None
+
+        for discord_id in discord_ids:
+            if update.status == "initial":
+                delivery.enqueue(discord_id, content="✅ Initial Tarkov stat snapshot saved.")
+            else:
+                delivery.enqueue(discord_id, embeds=update.embeds)
+        return update
 
-    updated_embed.add_field(name="Achievements", value=f"```{annotate_change(achievements, prev_achievements)}```", inline=True)
-    updated_embed.add_field(name="PMC Raids", value=f"```{annotate_change(pmc_raids, prev_raids)}```", inline=True)
-    updated_embed.add_field(name="Survived", value=f"```{annotate_change(survived, prev_survived)}```", inline=True)
-    updated_embed.add_field(name="Kills", value=f"```{annotate_change(kills, prev_kills)}```", inline=True)
-    updated_embed.add_field(name="Deaths", value=f"```{annotate_change(deaths, prev_deaths)}```", inline=True)
-    updated_embed.add_field(name="K/D Ratios", value=f"```{annotate_change(kd_ratio, prev_kd)}```", inline=True)
-    updated_embed.add_field(name="S/R Ratio", value=f"```{annotate_change(sr_ratio, prev_sr)}```", inline=True)
-    updated_embed.add_field(name="Time Played (hrs)", value=f"```{annotate_change(time_played_hrs, prev_played_hrs)}```", inline=True)
-
-    if diff["skills"]:
-        filtered_changes = [
-            s for s in diff["skills"]
-            if int(s["from"] // 100) != int(s["to"] // 100)
-        ]
-
-        if filtered_changes:
-            sorted_changes = sorted(filtered_changes, key=lambda s: s["diff"], reverse=True)[:5]
-            skill_lines = [
-                f"• {s['id']}: Level {int(s['from'] // 100)} → {int(s['to'] // 100)} (+{int(s['to'] // 100 - s['from'] // 100)})"
-                for s in sorted_changes
-            ]
-            updated_embed.add_field(name="🧠 Top Skill Changes", value=f"```{chr(10).join(skill_lines)}```", inline=False)
-        else:
-            updated_embed.add_field(name="🧠 Top Skill Changes", value="```No skill level changes```", inline=False)
-
-    if diff["mastery"]:
-        filtered_mastery = [
-            m for m in diff["mastery"]
-            if int(m["from"]) != int(m["to"])
-        ]
-
-        if filtered_mastery:
-            sorted_changes = sorted(filtered_changes, key=lambda m: m["diff"], reverse=True)[:5]
-            mastery_lines = [
-                f"• {m['id']}: EXP {int(m['from'])} → {int(m['to'])} (+{int(m['to'] - m['from'])})"
-                for m in filtered_mastery
-            ]
-            updated_embed.add_field(name="🔫 Weapon Mastery Changes", value=f"```{chr(10).join(mastery_lines)}```", inline=False)
-        else:
-            updated_embed.add_field(name="🔫 Weapon Mastery Changes", value="```No weapon mastery level changes```", inline=False)
+    except Exception as e:
+        metrics.inc("check_failures")
+        print(f"❌ Failed for player {player_id}: {e}")
+        traceback.print_exc()
+        return None
 
-    updated_embed.set_footer(text="Tracked via PVE Stats Tracker and Tarkov.Dev")
+async def apply_update(player_id, discord_ids, fetched, update):
+    # Only runs once the queued DMs are on disk, so advancing the snapshot can't lose a notification
+    try:
+        latest = update.profile
+        await write_snapshot(player_id, update.snapshot, fetched.validators)
+        record_history(player_id, latest)
+        update_roster(player_id, latest)
+
+        if update.status == "changed":
+            for discord_id in discord_ids:
+                if discord_id in user_config:
+                    user_config[discord_id]["last_notified"] = latest.updated
+            save_user_config()
+        return True
 
-    # ▶️ Overall Embed
-    overall_embed = Embed(
-        title=f"📘 Overall PVE Tarkov Stats for {name}",
-        color=0x6666ff
-    )
-    overall_embed.set_thumbnail(url="https://cdn-icons-png.flaticon.com/512/5354/5354526.png")
-
-    overall_embed.add_field(name="PMC Level", value=f"```{level}```", inline=False)
-    overall_embed.add_field(name="Experience", value=f"```{exp}```", inline=True)
-    overall_embed.add_field(name="Achievements", value=f"```{achievements}```", inline=True)
-    overall_embed.add_field(name="PMC Raids", value=f"```{pmc_raids}```", inline=True)
-    overall_embed.add_field(name="Survived", value=f"```{survived}```", inline=True)
-    overall_embed.add_field(name="K/D Ratio", value=f"```{kd_ratio:.2f}```", inline=True)
-    overall_embed.add_field(name="S/R Ratio", value=f"```{sr_ratio:.2f}```", inline=True)
-    overall_embed.add_field(name="Longest Win Streak", value=f"```{annotate_change(win_streak, prev_streak)}```", inline=True)
-    
-    all_skills = data.get("skills", {}).get("Common", [])
-    if all_skills:
-        top_skills = sorted(all_skills, key=lambda s: s["Progress"], reverse=True)[:5]
-        skills_text = "\n".join([
-            f"{s['Id']}: Level {int(s['Progress'] // 100)}"
-            for s in top_skills
-        ])
-        overall_embed.add_field(name="🏅 Top Skills", value=f"```{skills_text}```", inline=False)
-
-    overall_embed.set_footer(text="Snapshot from PVE Stats Tracker and Tarkov.Dev")
-
-    return updated_embed, overall_embed
+    except Exception as e:
+        metrics.inc("check_failures")
+        print(f"❌ Failed to save update for player {player_id}: {e}")
+        traceback.print_exc()
+        return False
+
+def log_conditional_stats(profiles):
+    unchanged = [p for p in profiles.values() if not isinstance(p, Exception) and p.not_modified]
+    saved_kb = sum(p.size for p in unchanged) / 1024
+    # Each 304 skips parsing the response body and re-reading the snapshot
+    print(f"⚡ Conditional fetch: {len(unchanged)}/{len(profiles)} unchanged, {saved_kb:,.1f} KB and {len(unchanged) * 2} JSON parses saved")
+
+async def run_sweep(entries):
+    global profile_next_sweep
+    sampler = None
+    if profile_next_sweep:
+        profile_next_sweep = False
+        sampler = StackSampler()
+        sampler.start()
+    try:
+        with metrics.span("sweep"):
+            await sweep(entries)
+    finally:
+        if sampler is not None:
+            sampler.stop()
+            report_sweep_profile(sampler)
+
+def report_sweep_profile(sampler):
+    global last_sweep_profile
+    last_sweep_profile = (sampler.samples, sampler.top(10))
+    sampler.write_folded(SWEEP_PROFILE_FILE)
+    print(f"🔬 Profiled sweep: {sampler.samples} samples, folded stacks written to {SWEEP_PROFILE_FILE}")
+    for function, count in last_sweep_profile[1]:
+        print(f"   {count / max(sampler.samples, 1):6.1%}  {function}")
+
+async def sweep(entries):
+    # Users tracking the same player, possibly from different guilds, share one fetch and one analysis
+    watchers = {}
+    for discord_id, data in entries:
+        watchers.setdefault(data["player_id"], []).append(discord_id)
+    metrics.inc("players_checked", len(watchers))
+    profiles = await fetch_all(watchers)
+
+    updates = await asyncio.gather(*(
+        check_player(player_id, discord_ids, profiles[player_id])
+        for player_id, discord_ids in watchers.items()
+    ))
+    # Persist the notifications before any snapshot advances: after a crash in between, the next
+    # sweep would see those players as unchanged and never notify them
+    await delivery.flush()
+    pending = [(player_id, update) for player_id, update in zip(watchers, updates) if update is not None]
+    applied = await asyncio.gather(*(
+        apply_update(player_id, watchers[player_id], profiles[player_id], update)
+        for player_id, update in pending
+    ))
+    changed = {player_id for (player_id, _), ok in zip(pending, applied) if ok}
+    for player_id in watchers:
+        poll_scheduler.mark(player_id, player_id in changed)
+    poll_scheduler.save()
+
+    recorded = history_store.flush()
+    if recorded:
+        print(f"🗄 Recorded {recorded} history rows.")
+    log_conditional_stats(profiles)
+    log_cache_stats()
+
+    await delivery.join()
+    latencies = delivery.take_latencies()
+    if latencies:
+        p = percentiles(latencies)
+        print(f"📬 Delivered {len(latencies)} DMs: p50 {p[50]:.2f}s, p90 {p[90]:.2f}s, p99 {p[99]:.2f}s")
 
 async def daily_task():
     print("🔁 Running daily stat check...")
+    await run_sweep(list(user_config.items()))
 
-    for discord_id, data in user_config.items():
-        player_id = data["player_id"]
-        try:
-            latest = fetch_data(player_id)
-            snapshot_file = get_snapshot_file(player_id)
-
-            user = await bot.fetch_user(discord_id)
+async def poll_tick():
+    due = set(poll_scheduler.take_due())
+    entries = [(discord_id, data) for discord_id, data in user_config.items() if data["player_id"] in due]
+    if not entries:
+        return
+    print(f"🔁 Polling slice of {len(due)} players...")
+    await run_sweep(entries)
 
-            if os.path.exists(snapshot_file):
-                with open(snapshot_file, "r") as f:
-                    previous = json.load(f)
-                
-                prev_updated = previous.get("updated")
-                latest_updated = latest.get("updated")
-
-                if prev_updated == latest_updated:
-                    print(f"📭 No new update for {player_id}.")
-                    continue
-            else:
-                # No previous snapshot, save and notify
-                with open(snapshot_file, "w") as f:
-                    json.dump(latest, f, indent=2)
-                await user.send("✅ Initial Tarkov stat snapshot saved.")
-                continue
-
-
-            diff = diff_stats(latest, previous)
-            updated_embed, overall_embed = format_embed(latest, diff, player_id, previous)
-
-            await user.send(embeds=[updated_embed, overall_embed])
-
-            with open(snapshot_file, "w") as f:
-                json.dump(latest, f, indent=2)
-            
-            user_config[discord_id]["last_notified"] = latest_updated
-            save_user_config()
-
-        except Exception as e:
-            print(f"❌ Failed for user {discord_id}: {e}")
-            traceback.print_exc()
+async def refresh_player_index():
+    try:
+        await player_index.refresh(fetcher.session())
+    except Exception as e:
+        print(f"❌ Failed to refresh player index: {e}")
 
 async def statChannels():
     print("🔁 Running stat channels check...")
-    TARGET_GUILD_ID = 972229559233695814
-    target_guild = bot.get_guild(TARGET_GUILD_ID)
-    if target_guild:
-        print(f"📊 Setting up stat channels in guild: {target_guild.name}")
-        await update_stats_channels(target_guild)
-    else:
-        print("⚠️ Target guild not found. Make sure the bot is in the correct server.")
+    if not bot.guilds:
+        print("⚠️ The bot isn't in any server yet.")
+        return
+    await refresh_stat_channels(bot.guilds)
 
 
 @bot.event
 async def on_ready():
     print(f"✅ Bot logged in as {bot.user}")
-    scheduler.add_job(daily_task, 'interval', hours=3)  # Set to every 24 hours
-    scheduler.add_job(statChannels, 'interval', hours=3)  # Set to every 6 hours
+    if scheduler.running:
+        # on_ready fires again after reconnects, the jobs are already registered
+        return
+
+    if POLL_MODE == "sharded":
+        poll_scheduler.load()
+        poll_scheduler.sync(user_data["player_id"] for user_data in user_config.values())
+        poll_scheduler.save()
+        # Late or overlapping ticks are caught up by take_due() instead of dropped
+        scheduler.add_job(poll_tick, 'interval', seconds=poll_scheduler.tick_seconds, misfire_grace_time=None, coalesce=True)
+        print(f"⏰ Sharded polling: {len(poll_scheduler.players)} players over {poll_scheduler.slots} slots, busiest slot {max(poll_scheduler.slot_loads(), default=0)}.")
+    else:
+        scheduler.add_job(daily_task, 'interval', hours=POLL_INTERVAL_HOURS, misfire_grace_time=None, coalesce=True)
+    scheduler.add_job(statChannels, 'interval', hours=POLL_INTERVAL_HOURS)
+    scheduler.add_job(refresh_player_index, 'interval', hours=PLAYER_INDEX_REFRESH_HOURS)
     scheduler.start()
+    if player_index.stale:
+        asyncio.create_task(refresh_player_index())
     print("⏰ Scheduler started.")
-    print("▶️ Running daily_task immediately...")
-    await daily_task()
+    if POLL_MODE == "sharded":
+        print("▶️ Polling the current slice immediately...")
+        await poll_tick()
+    else:
+        print("▶️ Running daily_task immediately...")
+        await daily_task()
     await statChannels()
 
+TRACK_URL_PREFIX = "https://tarkov.dev/players/pve/"
+# Discord IDs with a !track still in flight, so a second one can't race the first
+pending_tracks = set()
+
+def track_guide(reason):
+    return (
+        f"{reason}\n\n"
+        "🧭 To track your Tarkov stats:\n"
+        "1. Go to **<https://tarkov.dev/players?gameMode=pve>**\n"
+        "2. Search for your name or someone else's\n"
+        "3. Copy the full player URL (e.g. `https://tarkov.dev/players/pve/9571121`)\n"
+        "4. Use this command again: `!track <url>` or `!track <nickname>`"
+    )
+
+async def resolve_player_id(target):
+    if target.startswith(TRACK_URL_PREFIX):
+        return target.rstrip("/").split("/")[-1]
+
+    player_id = player_index.find(target)
+    if player_id is None and player_index.stale:
+        await refresh_player_index()
+        player_id = player_index.find(target)
+    return player_id
+
 @bot.command(name="track")
-async def track(ctx, url: str):
+async def track(ctx, target: str):
     try:
-        # Validate and extract player ID from the provided URL
-        if not url.startswith("https://tarkov.dev/players/pve/"):
-            guide_msg = (
-                "❌ **Invalid link format.**\n\n"
-                "🧭 To track your Tarkov stats:\n"
-                "1. Go to **<https://tarkov.dev/players?gameMode=pve>**\n"
-                "2. Search for your name or someone else's\n"
-                "3. Copy the full player URL (e.g. `https://tarkov.dev/players/pve/9571121`)\n"
-                "4. Use this command again: `!track <url>`"
-            )
-            await ctx.send(guide_msg)
+        # Accept either a tarkov.dev player URL or a nickname from the player index
+        if target.startswith("http") and not target.startswith(TRACK_URL_PREFIX):
+            await ctx.send(track_guide("❌ **Invalid link format.**"))
             return
 
+        player_id = await resolve_player_id(target)
+        if player_id is None:
+            await ctx.send(track_guide(f"❌ **Couldn't find a player named `{target}`.**"))
+            return
 
-        player_id = url.split("/")[-1]
         if not player_id.isdigit():
             await ctx.send("❌ Couldn't extract a valid player ID from the URL.")
             return
 
         discord_id = str(ctx.author.id)
+        guild_id = str(ctx.guild.id) if ctx.guild else None
 
-        # 🔒 Prevent overwrite
-        if discord_id in user_config:
-            await ctx.send(f"⚠️ You are already tracking a player. Use `!untrack` first if you'd like to track someone else.")
+        # Already tracking this player from another server: just count them toward this one too
+        tracked = user_config.get(discord_id)
+        if tracked and tracked["player_id"] == player_id and guild_id and guild_id not in tracked.get("guilds", []):
+            tracked.setdefault("guilds", []).append(guild_id)
+            save_user_config()
+            guild_rosters.sync(user_config)
+            await ctx.send(f"📌 <@{ctx.author.id}>, your tracked profile now also counts toward this server's stats.")
             return
 
-        latest = fetch_data(player_id)
-        snapshot_file = get_snapshot_file(player_id)
-
-        if os.path.exists(snapshot_file):
-            with open(snapshot_file, "r") as f:
-                previous = json.load(f)
-        else:
-            previous = None
+        # 🔒 Prevent overwrite (also blocks a second !track while the first is still running)
+        if discord_id in user_config or discord_id in pending_tracks:
+            await ctx.send(f"⚠️ You are already tracking a player. Use `!untrack` first if you'd like to track someone else.")
+            return
+        pending_tracks.add(discord_id)
 
-        user = await bot.fetch_user(discord_id)
+        with metrics.span("track_fetch"):
+            fetched = await profile_cache.get(player_id)
+        latest = parse_profile(fetched)
+        has_snapshot = snapshot_store.exists(player_id)
 
-        if not previous:
-            with open(snapshot_file, "w") as f:
-                json.dump(latest, f, indent=2)
+        if not has_snapshot:
+            save_snapshot(player_id, latest.raw, fetched.validators)
+            record_history(player_id, latest)
+            history_store.flush()
 
         # 📊 Create embed
         diff = diff_stats(latest, latest)  # No change yet
         updated_embed, overall_embed = format_embed(latest, diff, player_id)
 
         # 📩 Send DM
-        user = await bot.fetch_user(ctx.author.id)
-        await user.send(f"✅ You're now tracking **{latest['info'].get('nickname', 'Unknown')}** (ID: `{player_id}`) — here’s your current snapshot:")
+        user = ctx.author
+        await user.send(f"✅ You're now tracking **{latest.nickname}** (ID: `{player_id}`) — here’s your current snapshot:")
         await user.send(embeds=[updated_embed, overall_embed])
 
         # ✅ Let them know in server channel
@@ -465,13 +536,20 @@ async def track(ctx, url: str):
         # ✅ Save to user_config
         user_config[discord_id] = {
             "player_id": player_id,
-            "last_notified": latest.get("updated")
+            "last_notified": latest.updated,
+            "guilds": [guild_id] if guild_id else []
         }
         save_user_config()
+        update_roster(player_id, latest)
+        guild_rosters.sync(user_config)
+        poll_scheduler.add(player_id)
+        poll_scheduler.save()
 
     except Exception as e:
         await ctx.send(f"❌ Error during tracking: {e}")
         traceback.print_exc()
+    finally:
+        pending_tracks.discard(str(ctx.author.id))
 
 @bot.command(name="untrack")
 async def untrack(ctx):
@@ -480,25 +558,170 @@ async def untrack(ctx):
     if discord_id in user_config:
         # Get tracked player ID and nickname
         tracked_player_id = user_config[discord_id]["player_id"]
-        nickname = "Unknown"
-
-        try:
-            index_data = requests.get("https://players.tarkov.dev/profile/index.json").json()
-            nickname = index_data.get(tracked_player_id, "Unknown")
-        except:
-            pass
-
-        # Delete snapshot file if it exists
-        snapshot_path = get_snapshot_file(tracked_player_id)
-        if os.path.exists(snapshot_path):
-            os.remove(snapshot_path)
+        nickname = player_index.nickname(tracked_player_id)
+        if nickname is None:
+            snapshot = load_snapshot(tracked_player_id)
+            nickname = snapshot["info"].get("nickname", "Unknown") if snapshot else "Unknown"
 
         # Remove from config and save
         del user_config[discord_id]
         save_user_config()
+        guild_rosters.sync(user_config)
+
+        # The snapshot is shared by everyone tracking this player, so it goes with the last of them
+        if not any(u["player_id"] == tracked_player_id for u in user_config.values()):
+            snapshot_store.delete(tracked_player_id)
+            profile_cache.invalidate(tracked_player_id)
+            remove_from_roster(tracked_player_id)
+            poll_scheduler.remove(tracked_player_id)
+            poll_scheduler.save()
+            await ctx.send(f"❌ You have stopped tracking **{nickname}**, and the snapshot was deleted, <@{ctx.author.id}>.")
+        else:
+            await ctx.send(f"❌ You have stopped tracking **{nickname}**, <@{ctx.author.id}>.")
+    else:
+        await ctx.send(f"⚠️ You are not currently tracking a player, <@{ctx.author.id}>.")
+
+@bot.command(name="leaderboard")
+async def leaderboard(ctx, metric: str = "kd"):
+    key = normalize_metric(metric)
+    if key is None:
+        await ctx.send(f"❌ Unknown metric `{metric}`. Try one of: {', '.join(f'`{m}`' for m in LEADERBOARD_METRICS)}.")
+        return
+
+    if key == "xp_week":
+        refresh_weekly_xp()
 
-        await ctx.send(f"❌ You have stopped tracking **{nickname}**, and the snapshot was deleted, <@{ctx.author.id}>.")
+    # Only players tracked in this server; in DMs, those in the servers the user tracks from
+    if ctx.guild:
+        guild_ids = [str(ctx.guild.id)]
     else:
-        await ctx.send(f"⚠️ You are not currently tracking that player - **{nickname}**.")
+        guild_ids = sorted(user_config.get(str(ctx.author.id), {}).get("guilds", []))
+        if not guild_ids:
+            await ctx.send("📭 Use `!leaderboard` in a server to see its tracked players.")
+            return
+    players = guild_rosters.players(guild_ids)
+
+    title, fmt = LEADERBOARD_METRICS[key]
+    rankings = leaderboard_table.ranking(key, limit=10, key=(tuple(guild_ids), guild_rosters.version), players=players)
+    if not rankings:
+        await ctx.send("📭 No tracked players yet. Use `!track` to add one.")
+        return
+
+    medals = ["🥇", "🥈", "🥉"]
+    lines = [
+        f"{medals[i] if i < 3 else f'{i + 1}.'} [{nickname}](https://tarkov.dev/players/pve/{player_id}) — {fmt.format(value)}"
+        for i, (player_id, nickname, value) in enumerate(rankings)
+    ]
+    embed = Embed(title=f"🏆 PVE Leaderboard — {title}", description="\n".join(lines), color=0xffcc00)
+    embed.set_footer(text=f"{len(players)} tracked players • PVE Stats Tracker and Tarkov.Dev")
+    await ctx.send(embed=embed)
+
+def format_duration(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    return f"{seconds * 1000:.1f}ms"
+
+@bot.command(name="botstats")
+@commands.has_permissions(administrator=True)
+async def botstats(ctx, action: str = None):
+    global profile_next_sweep
+    if action == "profile":
+        profile_next_sweep = True
+        await ctx.send(f"🔬 The next sweep will be profiled; results show up here and in `{SWEEP_PROFILE_FILE}`.")
+        return
+
+    stage_lines = [f"{'stage':<17}{'count':>7}{'p50':>9}{'p99':>9}{'max':>9}"]
+    for stage, histogram in sorted(metrics.histograms.items()):
+        stage_lines.append(
+            f"{stage:<17}{histogram.count:>7}{format_duration(histogram.quantile(0.5)):>9}"
+            f"{format_duration(histogram.quantile(0.99)):>9}{format_duration(histogram.max):>9}"
+        )
+
+    statuses = ", ".join(f"{dict(labels)['status']}: {count}" for labels, count in sorted(metrics.labelled("upstream_responses").items()))
+    errors = ", ".join(f"{dict(labels)['kind']}: {count}" for labels, count in sorted(metrics.labelled("upstream_errors").items()))
+    fetch_stats = fetcher.stats()
+    cache_stats = profile_cache.stats()
+    lookups = cache_stats["hits"] + cache_stats["misses"] + cache_stats["coalesced"]
+    hit_rate = (cache_stats["hits"] + cache_stats["coalesced"]) / lookups * 100 if lookups else 0
+
+    embed = Embed(title="🩺 Bot Stats", color=0x999999)
+    embed.add_field(name="⏱ Stage Latency", value=f"```{chr(10).join(stage_lines)}```", inline=False)
+    embed.add_field(
+        name="🌐 Upstream",
+        value=(
+            f"```Responses: {statuses or 'none'}\n"
+            f"Errors: {errors or 'none'}\n"
+            f"Downloaded: {fetch_stats['bytes_downloaded'] / 1024 / 1024:,.1f} MB "
+            f"(saved {fetch_stats['bytes_saved'] / 1024 / 1024:,.1f} MB via 304)\n"
+            f"Cache hit rate: {hit_rate:.1f}%```"
+        ),
+        inline=False
+    )
+    rename_stats = channel_renamer.stats()
+    embed.add_field(
+        name="📬 Discord",
+        value=(
+            f"```DMs: {delivery.delivered} delivered, {delivery.failed} failed, {len(delivery.pending)} pending\n"
+            f"Renames: {rename_stats['applied']} applied, {rename_stats['deferred']} deferred```"
+        ),
+        inline=False
+    )
+    if last_sweep_profile:
+        samples, top = last_sweep_profile
+        lines = [f"{count / max(samples, 1):6.1%}  {function}" for function, count in top[:5]]
+        embed.add_field(name=f"🔬 Last Profiled Sweep ({samples} samples)", value=f"```{chr(10).join(lines)}```", inline=False)
+    embed.set_footer(text=f"Up {(time.time() - metrics.started) / 3600:,.1f}h • {metrics.counter('players_checked')} player checks")
+    await ctx.send(embed=embed)
+
+@botstats.error
+async def botstats_error(ctx, error):
+    if isinstance(error, (commands.MissingPermissions, commands.NoPrivateMessage)):
+        await ctx.send("❌ `!botstats` is limited to server administrators.")
+    else:
+        raise error
+
+async def main():
+    discord.utils.setup_logging()
+    delivery.start()
+    pipeline.start()
+    if PROFILE_WORKERS:
+        print(f"🧵 Profile analysis offloaded to {PROFILE_WORKERS} worker {pipeline.mode}.")
+    migrated = snapshot_store.migrate_json_snapshots()
+    if migrated:
+        print(f"📦 Migrated {migrated} JSON snapshots to the compact store.")
+    legacy_tracks = migrate_guild_config()
+    if legacy_tracks:
+        print(f"🏷 Assigned {legacy_tracks} existing tracks to guild {DEFAULT_GUILD_ID}.")
+    seed_roster()
+    if await player_index.load():
+        print(f"📇 Loaded player index with {len(player_index):,} players.")
+
+    # docker stop sends SIGTERM; close the bot so the flushes below still run
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, lambda: asyncio.create_task(bot.close()))
+        except NotImplementedError:
+            pass
 
-bot.run(DISCORD_TOKEN)
\ No newline at end of file
+    metrics_runner = None
+    if METRICS_PORT:
+        metrics_runner = await start_metrics_server(metrics, METRICS_HOST, int(METRICS_PORT))
+        print(f"📈 Serving metrics on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+    try:
+        async with bot:
+            await bot.start(DISCORD_TOKEN)
+    finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await delivery.close()
+        pipeline.close()
+        await fetcher.close()
+        history_store.close()
+        await user_config_store.close()
+        await guild_config_store.close()
+        print("💾 Flushed state to disk.")
+
+if __name__ == "__main__":
+    asyncio.run(main())